@@ -1,21 +1,114 @@
+import atexit
+import hashlib
 import logging
+import queue
+import re
 import sys
-from pathlib import Path
-from flask import Flask, send_from_directory
+from logging.handlers import MemoryHandler, QueueHandler, QueueListener
+from flask import Flask, Response, request
 from flask_cors import CORS
-from backend.config import Config
-from backend.routes import register_routes
-from backend.database import init_db
+from backend.utils import json_utils
+from backend.utils.logger import is_deferred_record
+
+
+# CORS 作用的路径（预编译，避免旧版 Flask-CORS 在每次请求时重新解析模式字符串）
+_API_PATH_RE = re.compile(r'^/api/.*')
+
+# 开发模式下根路由返回的 API 说明（内容固定，预先序列化一次）
+_API_INDEX_JSON = json_utils.dumps({
+    "message": "红墨 AI图文生成器 API",
+    "version": "0.1.0",
+    "endpoints": {
+        "health": "/api/health",
+        "outline": "POST /api/outline",
+        "generate": "POST /api/generate",
+        "images": "GET /api/images/<filename>"
+    }
+}).encode('utf-8')
+
+# 后台日志监听器（负责真正的 stdout 写入）
+_log_listener = None
+
+
+class _BurstBufferHandler(MemoryHandler):
+    """
+    在后台监听线程中缓冲日志记录
+
+    缓冲区满、遇到 WARNING 及以上级别、或日志队列已排空（一波日志结束）时，
+    把缓冲的记录格式化后一次性写入目标流，突发的 DEBUG/INFO 日志合并为一次 write()
+    """
+
+    def __init__(self, capacity: int, log_queue, target: logging.StreamHandler):
+        super().__init__(capacity, flushLevel=logging.WARNING, target=target, flushOnClose=True)
+        self.log_queue = log_queue
+
+    def shouldFlush(self, record):
+        return super().shouldFlush(record) or self.log_queue.empty()
+
+    def flush(self):
+        self.acquire()
+        try:
+            if not self.target or not self.buffer:
+                return
+            target = self.target
+            try:
+                # 与 target.handle() 一样先按目标处理器的级别和过滤器筛选
+                text = ''.join(
+                    target.format(record) + target.terminator
+                    for record in self.buffer
+                    if record.levelno >= target.level and target.filter(record)
+                )
+                target.acquire()
+                try:
+                    target.stream.write(text)
+                    target.flush()
+                finally:
+                    target.release()
+            except Exception:
+                self.handleError(self.buffer[-1])
+            self.buffer.clear()
+        finally:
+            self.release()
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """
+    日志框记录原样入队的 QueueHandler
+
+    默认的 prepare() 会在调用方线程执行 msg % args，DetailedLogger 的日志框也因此在生图/请求线程里拼接；
+    参数全部是日志框的记录直接入队，由监听线程的处理器格式化时才生成边框文本
+    """
+
+    def prepare(self, record):
+        if is_deferred_record(record):
+            return record
+        return super().prepare(record)
+
+
+def _stop_log_listener():
+    """停止后台日志监听器，并输出队列和缓冲区中剩余的日志"""
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        for handler in _log_listener.handlers:
+            handler.flush()
+        _log_listener = None
+
+
+atexit.register(_stop_log_listener)
 
 
 def setup_logging():
     """配置日志系统"""
+    global _log_listener
+
     # 创建根日志器
     root_logger = logging.getLogger()
     root_logger.setLevel(logging.DEBUG)
 
-    # 清除已有的处理器
+    # 清除已有的处理器（重复调用时先停掉旧的监听器）
     root_logger.handlers.clear()
+    _stop_log_listener()
 
     # 控制台处理器 - 详细格式
     console_handler = logging.StreamHandler(sys.stdout)
@@ -26,7 +119,14 @@ def setup_logging():
         datefmt='%H:%M:%S'
     )
     console_handler.setFormatter(console_format)
-    root_logger.addHandler(console_handler)
+
+    # 请求线程只负责入队，日志框拼接和 stdout 写入都交给后台线程，避免阻塞请求；
+    # 后台线程再把突发的日志合并成一次写入
+    log_queue = queue.SimpleQueue()
+    buffer_handler = _BurstBufferHandler(512, log_queue, console_handler)
+    _log_listener = QueueListener(log_queue, buffer_handler, respect_handler_level=True)
+    _log_listener.start()
+    root_logger.addHandler(_DeferredQueueHandler(log_queue))
 
     # 设置各模块的日志级别
     logging.getLogger('backend').setLevel(logging.DEBUG)
@@ -37,12 +137,17 @@ def setup_logging():
 
 
 def create_app():
+    # 延迟导入：只导入 backend.app 的场景（如 CLI 工具）不必加载模型和路由模块
+    from backend.config import Config, PROJECT_ROOT
+    from backend.database import init_db
+    from backend.routes import register_routes
+
     # 设置日志
     logger = setup_logging()
     logger.info("🚀 正在启动 红墨 AI图文生成器...")
 
     # 检查是否存在前端构建产物（Docker 环境）
-    frontend_dist = Path(__file__).parent.parent / 'frontend' / 'dist'
+    frontend_dist = PROJECT_ROOT / 'frontend' / 'dist'
     if frontend_dist.exists():
         logger.info("📦 检测到前端构建产物，启用静态文件托管模式")
         app = Flask(
@@ -56,6 +161,12 @@ def create_app():
 
     app.config.from_object(Config)
 
+    # jsonify / get_json 改用 orjson（未安装时回退到标准库，datetime 同样输出 ISO 8601）
+    if json_utils.orjson is not None:
+        app.json = json_utils.OrjsonProvider(app)
+    else:
+        app.json = json_utils.IsoDateJSONProvider(app)
+
     # 初始化数据库
     init_db(app)
 
@@ -65,15 +176,22 @@ def create_app():
         check_and_migrate()
 
     CORS(app, resources={
-        r"/api/*": {
-            "origins": Config.CORS_ORIGINS,
-            "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-            "allow_headers": ["Content-Type", "Authorization"],
-            "expose_headers": ["Authorization"],
+        _API_PATH_RE: {
+            "origins": tuple(Config.CORS_ORIGINS),
+            "methods": ("GET", "POST", "PUT", "DELETE", "OPTIONS"),
+            "allow_headers": ("Content-Type", "Authorization"),
+            "expose_headers": ("Authorization",),
             "supports_credentials": True
         }
     })
 
+    # 每个请求开始时重置请求级配置缓存
+    app.before_request(Config.reset_request_cache)
+
+    # 每个请求结束时清除认证装饰器缓存在 g 上的用户
+    from backend.utils.auth import clear_current_user
+    app.teardown_request(clear_current_user)
+
     # 注册所有 API 路由
     register_routes(app)
 
@@ -83,27 +201,28 @@ def create_app():
 
     # 根据是否有前端构建产物决定根路由行为
     if frontend_dist.exists():
+        # index.html 每次构建后不再变化，启动时读入内存并计算 ETag，避免每次导航都读文件
+        index_html = (frontend_dist / 'index.html').read_bytes()
+        index_etag = hashlib.md5(index_html, usedforsecurity=False).hexdigest()
+
+        def _index_response():
+            response = Response(index_html, mimetype='text/html')
+            response.set_etag(index_etag)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response.make_conditional(request)
+
         @app.route('/')
         def serve_index():
-            return send_from_directory(app.static_folder, 'index.html')
+            return _index_response()
 
         # 处理 Vue Router 的 HTML5 History 模式
         @app.errorhandler(404)
         def fallback(e):
-            return send_from_directory(app.static_folder, 'index.html')
+            return _index_response()
     else:
         @app.route('/')
         def index():
-            return {
-                "message": "红墨 AI图文生成器 API",
-                "version": "0.1.0",
-                "endpoints": {
-                    "health": "/api/health",
-                    "outline": "POST /api/outline",
-                    "generate": "POST /api/generate",
-                    "images": "GET /api/images/<filename>"
-                }
-            }
+            return Response(_API_INDEX_JSON, mimetype='application/json')
 
     return app
 
@@ -114,44 +233,48 @@ def _validate_config_on_startup(logger):
 
     logger.info("📋 检查服务商配置...")
 
-    # 检查文本服务商配置
-    text_providers = ProviderConfig.query.filter_by(category='text').all()
-    active_text = ProviderConfig.query.filter_by(category='text', is_active=True).first()
+    # 一次查询取出所有服务商，只读取日志需要的列，再按类别分组
+    rows = ProviderConfig.query.with_entities(
+        ProviderConfig.category,
+        ProviderConfig.name,
+        ProviderConfig.is_active,
+        ProviderConfig.api_key
+    ).all()
 
-    if text_providers:
-        provider_names = [p.name for p in text_providers]
-        active_name = active_text.name if active_text else '未设置'
-        logger.info(f"✅ 文本生成配置: 激活={active_name}, 可用服务商={provider_names}")
+    # 单次遍历同时收集各类别的服务商名称和激活的服务商
+    summary = {category: {'names': [], 'active': None} for category in ('text', 'image')}
+    for row in rows:
+        info = summary.get(row.category)
+        if info is None:
+            continue
+        info['names'].append(row.name)
+        if row.is_active and info['active'] is None:
+            info['active'] = row
 
-        if active_text:
-            if not active_text.api_key:
-                logger.warning(f"⚠️  文本服务商 [{active_name}] 未配置 API Key")
-            else:
-                logger.info(f"✅ 文本服务商 [{active_name}] API Key 已配置")
-    else:
-        logger.warning("⚠️  未配置任何文本服务商，请在设置页面添加")
+    # 检查文本/图片服务商配置
+    for category, label in (('text', '文本'), ('image', '图片')):
+        provider_names = summary[category]['names']
+        active = summary[category]['active']
 
-    # 检查图片服务商配置
-    image_providers = ProviderConfig.query.filter_by(category='image').all()
-    active_image = ProviderConfig.query.filter_by(category='image', is_active=True).first()
+        if not provider_names:
+            logger.warning(f"⚠️  未配置任何{label}服务商，请在设置页面添加")
+            continue
 
-    if image_providers:
-        provider_names = [p.name for p in image_providers]
-        active_name = active_image.name if active_image else '未设置'
-        logger.info(f"✅ 图片生成配置: 激活={active_name}, 可用服务商={provider_names}")
+        active_name = active.name if active else '未设置'
+        logger.info(f"✅ {label}生成配置: 激活={active_name}, 可用服务商={provider_names}")
 
-        if active_image:
-            if not active_image.api_key:
-                logger.warning(f"⚠️  图片服务商 [{active_name}] 未配置 API Key")
+        if active:
+            if not active.api_key:
+                logger.warning(f"⚠️  {label}服务商 [{active_name}] 未配置 API Key")
             else:
-                logger.info(f"✅ 图片服务商 [{active_name}] API Key 已配置")
-    else:
-        logger.warning("⚠️  未配置任何图片服务商，请在设置页面添加")
+                logger.info(f"✅ {label}服务商 [{active_name}] API Key 已配置")
 
     logger.info("✅ 配置检查完成")
 
 
 if __name__ == '__main__':
+    from backend.config import Config
+
     app = create_app()
     app.run(
         host=Config.HOST,
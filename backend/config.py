@@ -2,11 +2,23 @@
 配置管理模块 - SQLAlchemy 实现
 """
 import logging
-import json
+import threading
+from contextvars import ContextVar
 from pathlib import Path
+from typing import Optional
 
 logger = logging.getLogger(__name__)
 
+# 项目根目录（模块加载时计算一次）
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# 请求级配置缓存：(配置版本, {category: config})，每个请求开始时重置
+_providers_config_cache: ContextVar[Optional[tuple]] = ContextVar('providers_config_cache', default=None)
+
+# 全局配置版本：reload_config 时递增，其他线程/请求中版本落后的请求级缓存随之失效
+_config_generation = 0
+_config_generation_lock = threading.Lock()
+
 
 class Config:
     """应用配置类"""
@@ -16,10 +28,6 @@ class Config:
     CORS_ORIGINS = ['http://localhost:5173', 'http://localhost:3000']
     OUTPUT_DIR = 'output'
 
-    # 配置缓存
-    _image_providers_config = None
-    _text_providers_config = None
-
     @classmethod
     def _get_providers_from_db(cls, category: str) -> dict:
         """
@@ -33,7 +41,17 @@ class Config:
         """
         from backend.models import ProviderConfig
 
-        providers = ProviderConfig.query.filter_by(category=category).all()
+        # 只查询需要的列，返回轻量元组，跳过完整 ORM 对象的构建
+        query = ProviderConfig.query.with_entities(
+            ProviderConfig.name,
+            ProviderConfig.provider_type,
+            ProviderConfig.api_key,
+            ProviderConfig.base_url,
+            ProviderConfig.model,
+            ProviderConfig.is_active,
+            ProviderConfig.extra_config
+        ).filter_by(category=category)
+        providers = query.all()
 
         if not providers:
             return {
@@ -51,8 +69,8 @@ class Config:
             if p.is_active:
                 result['active_provider'] = p.name
 
-            # 解析额外配置
-            extra = json.loads(p.extra_config) if p.extra_config else {}
+            # 解析额外配置（与 ProviderConfig.extra 使用同一解析函数）
+            extra = ProviderConfig.parse_extra(p.extra_config)
 
             # 构建服务商配置
             provider_config = {
@@ -72,37 +90,54 @@ class Config:
 
         return result
 
+    @staticmethod
+    def _get_request_cache() -> dict:
+        """获取当前请求上下文的配置缓存（配置已在别处重新加载时返回新的空缓存）"""
+        generation = _config_generation
+        entry = _providers_config_cache.get()
+        if entry is None or entry[0] != generation:
+            entry = (generation, {})
+            _providers_config_cache.set(entry)
+        return entry[1]
+
+    @staticmethod
+    def reset_request_cache():
+        """重置当前请求上下文的配置缓存（在每个请求开始时调用）"""
+        _providers_config_cache.set(None)
+
     @classmethod
     def load_image_providers_config(cls):
         """加载图片生成服务商配置"""
-        if cls._image_providers_config is not None:
-            return cls._image_providers_config
+        cache = cls._get_request_cache()
+        if 'image' in cache:
+            return cache['image']
 
         logger.debug("从数据库加载图片服务商配置")
-        cls._image_providers_config = cls._get_providers_from_db('image')
+        config = cache['image'] = cls._get_providers_from_db('image')
 
-        if cls._image_providers_config['providers']:
-            logger.debug(f"图片配置加载成功: {list(cls._image_providers_config['providers'].keys())}")
+        if config['providers']:
+            logger.debug(f"图片配置加载成功: {list(config['providers'].keys())}")
         else:
             logger.warning("未配置任何图片服务商")
 
-        return cls._image_providers_config
+        return config
 
     @classmethod
     def load_text_providers_config(cls):
         """加载文本生成服务商配置"""
-        if cls._text_providers_config is not None:
-            return cls._text_providers_config
+        cache = cls._get_request_cache()
+        if 'text' in cache:
+            return cache['text']
 
         logger.debug("从数据库加载文本服务商配置")
-        cls._text_providers_config = cls._get_providers_from_db('text')
+        config = cache['text'] = cls._get_providers_from_db('text')
 
-        if cls._text_providers_config['providers']:
-            logger.debug(f"文本配置加载成功: {list(cls._text_providers_config['providers'].keys())}")
+        if config['providers']:
+            logger.debug(f"文本配置加载成功: {list(config['providers'].keys())}")
         else:
             logger.warning("未配置任何文本服务商")
 
-        return cls._text_providers_config
+        return config
 
     @classmethod
     def get_active_image_provider(cls):
@@ -240,7 +275,9 @@ class Config:
 
     @classmethod
     def reload_config(cls):
-        """重新加载配置（清除缓存）"""
+        """重新加载配置（递增全局配置版本，使所有线程/请求中的配置缓存失效）"""
+        global _config_generation
         logger.info("重新加载所有配置...")
-        cls._image_providers_config = None
-        cls._text_providers_config = None
+        with _config_generation_lock:
+            _config_generation += 1
+        cls.reset_request_cache()
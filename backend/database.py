@@ -2,11 +2,37 @@
 数据库初始化模块
 """
 import logging
-from pathlib import Path
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from backend.config import PROJECT_ROOT
 from backend.models import db
 
 logger = logging.getLogger(__name__)
 
+# 每个新连接执行的 SQLite PRAGMA：
+# - WAL 模式下读写互不阻塞，synchronous=NORMAL 在 WAL 下仍保证一致性
+# - 临时表放内存，mmap 256MB 减少 read() 系统调用，页缓存 64MB
+SQLITE_PRAGMAS = """
+PRAGMA foreign_keys=ON;
+PRAGMA journal_mode=WAL;
+PRAGMA synchronous=NORMAL;
+PRAGMA temp_store=MEMORY;
+PRAGMA mmap_size=268435456;
+PRAGMA cache_size=-65536;
+"""
+
+
+def set_sqlite_pragma(dbapi_connection, connection_record):
+    """新连接建立时启用 SQLite 外键约束及性能相关 PRAGMA"""
+    cursor = dbapi_connection.cursor()
+    cursor.executescript(SQLITE_PRAGMAS)
+    cursor.close()
+
+
+# 监听器挂在全局 Engine 类上，只需在模块加载时注册一次（多次 init_db 不会重复注册）
+if not event.contains(Engine, "connect", set_sqlite_pragma):
+    event.listen(Engine, "connect", set_sqlite_pragma)
+
 
 def init_db(app):
     """
@@ -16,7 +42,7 @@ def init_db(app):
         app: Flask 应用实例
     """
     # 数据库文件存放在项目根目录的 data 文件夹
-    db_path = Path(__file__).parent.parent / 'data' / 'redink.db'
+    db_path = PROJECT_ROOT / 'data' / 'redink.db'
     db_path.parent.mkdir(exist_ok=True)
 
     app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
@@ -24,21 +50,16 @@ def init_db(app):
     # 启用外键约束（SQLite 默认不启用）
     app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
         'connect_args': {'check_same_thread': False},
+        # 编译后 SQL 的缓存条目数（默认 500），查询种类较多时避免缓存被挤出后反复编译
+        'query_cache_size': 1200,
+        # 连接池：常驻 10 个连接，突发时最多再借 20 个，避免并发请求和后台生成线程排队等待连接
+        'pool_size': 10,
+        'max_overflow': 20,
     }
 
     db.init_app(app)
 
     with app.app_context():
-        # 启用 SQLite 外键约束
-        from sqlalchemy import event
-        from sqlalchemy.engine import Engine
-
-        @event.listens_for(Engine, "connect")
-        def set_sqlite_pragma(dbapi_connection, connection_record):
-            cursor = dbapi_connection.cursor()
-            cursor.execute("PRAGMA foreign_keys=ON")
-            cursor.close()
-
         # 创建所有表
         db.create_all()
         logger.info(f"✅ 数据库初始化完成: {db_path}")
@@ -2,30 +2,46 @@
 数据迁移模块：从文件存储迁移到 SQLite 数据库
 """
 import os
-import json
 import shutil
 import logging
 import secrets
+from contextlib import contextmanager
 from pathlib import Path
 from datetime import datetime
 import yaml
 
+from backend.config import PROJECT_ROOT
 from backend.models import db, HistoryRecord, OutlinePage, TaskImage, ProviderConfig, User
+from backend.utils import json_utils
 from backend.utils.auth import hash_password
 
 logger = logging.getLogger(__name__)
 
+# 优先使用 libyaml 的 C 实现解析 YAML，未编译 libyaml 时回退到纯 Python 实现
+YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
 
-def ensure_users_table():
+# 历史记录迁移时每批写入的记录数
+MIGRATION_BATCH_SIZE = 500
+
+# 数据库 schema 版本，迁移检查全部成功后写入 PRAGMA user_version；
+# schema 变更时提升版本号，已有数据库会在下次启动时重新检查一次
+MIGRATION_SCHEMA_VERSION = 5
+
+
+def ensure_users_table(inspector=None):
     """
     确保 users 表存在
 
     使用原生 SQL 检查和创建，避免 ORM 模型与数据库不一致的问题
+
+    Args:
+        inspector: 可复用的 SQLAlchemy Inspector（可选）
     """
     from sqlalchemy import text, inspect
 
-    inspector = inspect(db.engine)
-    tables = inspector.get_table_names()
+    if inspector is None:
+        inspector = inspect(db.engine)
+    tables = set(inspector.get_table_names())
 
     if 'users' not in tables:
         logger.info("📋 创建 users 表...")
@@ -43,18 +59,23 @@ def ensure_users_table():
         logger.info("✅ users 表创建完成")
 
 
-def ensure_user_id_columns():
+def ensure_user_id_columns(inspector=None):
     """
     确保 history_records 和 provider_configs 表有 user_id 列
 
     使用原生 SQL 进行 schema 迁移，避免 ORM 查询失败
+
+    Args:
+        inspector: 可复用的 SQLAlchemy Inspector（可选）
     """
     from sqlalchemy import text, inspect
 
-    inspector = inspect(db.engine)
+    if inspector is None:
+        inspector = inspect(db.engine)
+    tables = set(inspector.get_table_names())
 
     # 检查 history_records 表
-    if 'history_records' in inspector.get_table_names():
+    if 'history_records' in tables:
         columns = [col['name'] for col in inspector.get_columns('history_records')]
         if 'user_id' not in columns:
             logger.info("📋 为 history_records 表添加 user_id 列...")
@@ -65,7 +86,7 @@ def ensure_user_id_columns():
             logger.info("✅ history_records.user_id 列添加完成")
 
     # 检查 provider_configs 表
-    if 'provider_configs' in inspector.get_table_names():
+    if 'provider_configs' in tables:
         columns = [col['name'] for col in inspector.get_columns('provider_configs')]
         if 'user_id' not in columns:
             logger.info("📋 为 provider_configs 表添加 user_id 列...")
@@ -75,170 +96,322 @@ def ensure_user_id_columns():
             db.session.commit()
             logger.info("✅ provider_configs.user_id 列添加完成")
 
+    # 补建查询索引（新库由 create_all 创建，这里兼容旧库）
+    if 'provider_configs' in tables:
+        db.session.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_provider_cat_active ON provider_configs (category, is_active)"
+        ))
+    if 'history_records' in tables:
+        db.session.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_history_user_created ON history_records (user_id, created_at DESC)"
+        ))
+        db.session.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_history_title_nocase ON history_records (title COLLATE NOCASE)"
+        ))
+    db.session.commit()
+
+
+def ensure_page_count_column(inspector=None):
+    """
+    确保 history_records 表有 page_count 列（旧库补列后按现有页面回填）
+
+    Args:
+        inspector: 可复用的 SQLAlchemy Inspector（可选）
+    """
+    from sqlalchemy import text, inspect
+
+    if inspector is None:
+        inspector = inspect(db.engine)
+    if 'history_records' not in set(inspector.get_table_names()):
+        return
+
+    columns = [col['name'] for col in inspector.get_columns('history_records')]
+    if 'page_count' in columns:
+        return
+
+    logger.info("📋 为 history_records 表添加 page_count 列...")
+    db.session.execute(text(
+        "ALTER TABLE history_records ADD COLUMN page_count INTEGER NOT NULL DEFAULT 0"
+    ))
+    db.session.execute(text("""
+        UPDATE history_records SET page_count = (
+            SELECT COUNT(*) FROM outline_pages WHERE outline_pages.record_id = history_records.id
+        )
+    """))
+    db.session.commit()
+    logger.info("✅ history_records.page_count 列添加完成")
+
 
 def get_project_root() -> Path:
     """获取项目根目录"""
-    return Path(__file__).parent.parent
+    return PROJECT_ROOT
 
 
 def backup_old_files():
     """备份旧的数据文件"""
     project_root = get_project_root()
     backup_dir = project_root / 'backup' / datetime.now().strftime('%Y%m%d_%H%M%S')
+    history_dir = project_root / 'history'
 
-    files_to_backup = [
-        project_root / 'history' / 'index.json',
-        project_root / 'text_providers.yaml',
-        project_root / 'image_providers.yaml',
+    # 一次 scandir 同时完成 index.json 存在性检查和历史 JSON 文件枚举
+    history_files = []
+    if history_dir.is_dir():
+        with os.scandir(history_dir) as it:
+            history_files = [
+                (entry.name, entry.path) for entry in it
+                if entry.name.endswith('.json') and entry.is_file()
+            ]
+
+    config_files = [
+        (f.name, f) for f in (
+            project_root / 'text_providers.yaml',
+            project_root / 'image_providers.yaml',
+        )
+        if f.is_file()
     ]
 
     # 检查是否有需要备份的文件
-    has_files = False
-    for f in files_to_backup:
-        if f.exists():
-            has_files = True
-            break
-
-    if not has_files:
+    has_index = any(name == 'index.json' for name, _ in history_files)
+    if not has_index and not config_files:
         logger.info("📁 没有找到需要备份的旧数据文件")
         return None
 
     # 创建备份目录
     backup_dir.mkdir(parents=True, exist_ok=True)
 
-    # 备份文件
-    for f in files_to_backup:
-        if f.exists():
-            dest = backup_dir / f.name
-            shutil.copy2(f, dest)
-            logger.info(f"📦 已备份: {f.name} -> {dest}")
-
-    # 备份历史记录 JSON 文件
-    history_dir = project_root / 'history'
-    if history_dir.exists():
-        for json_file in history_dir.glob('*.json'):
-            if json_file.name != 'index.json':
-                dest = backup_dir / json_file.name
-                shutil.copy2(json_file, dest)
-                logger.info(f"📦 已备份: {json_file.name}")
+    # 备份配置文件和历史记录 JSON 文件
+    for name, src in config_files + history_files:
+        dest = backup_dir / name
+        shutil.copy2(src, dest)
+        logger.info(f"📦 已备份: {name} -> {dest}")
 
     logger.info(f"✅ 备份完成: {backup_dir}")
     return backup_dir
 
 
+@contextmanager
+def _bulk_load_pragmas(conn):
+    """
+    迁移期间临时关闭同步写盘并使用内存日志，结束后恢复原设置
+
+    迁移是一次性的批量导入，失败后可从备份重新执行，因此可以放宽持久性要求。
+    WAL 模式在有其他连接时无法切换日志模式，此时只调整 synchronous。
+    """
+    synchronous = conn.exec_driver_sql("PRAGMA synchronous").scalar()
+    journal_mode = conn.exec_driver_sql("PRAGMA journal_mode").scalar()
+    switch_journal = journal_mode.lower() != 'wal'
+
+    conn.exec_driver_sql("PRAGMA synchronous=OFF")
+    if switch_journal:
+        conn.exec_driver_sql("PRAGMA journal_mode=MEMORY")
+    try:
+        yield conn
+    finally:
+        if switch_journal:
+            conn.exec_driver_sql(f"PRAGMA journal_mode={journal_mode}")
+        conn.exec_driver_sql(f"PRAGMA synchronous={synchronous}")
+
+
+def _build_history_rows(record_id: str, record_data: dict) -> tuple:
+    """
+    将旧 JSON 记录转换为待插入的行数据
+
+    Returns:
+        (history_records 行, outline_pages 行列表, task_images 行列表)
+    """
+    now = datetime.utcnow().isoformat()
+    record_row = {
+        'id': record_id,
+        'title': record_data.get('title', ''),
+        'status': record_data.get('status', 'draft'),
+        'thumbnail': record_data.get('thumbnail'),
+        'task_id': record_data.get('images', {}).get('task_id'),
+        'outline_text': record_data.get('outline', {}).get('raw', ''),
+        'created_at': datetime.fromisoformat(record_data.get('created_at', now)),
+        'updated_at': datetime.fromisoformat(record_data.get('updated_at', now))
+    }
+
+    page_rows = [
+        {
+            'record_id': record_id,
+            'page_index': page.get('index', 0),
+            'page_type': page.get('type', 'content'),
+            'content': page.get('content', '')
+        }
+        for page in record_data.get('outline', {}).get('pages', [])
+    ]
+    record_row['page_count'] = len(page_rows)
+
+    image_rows = [
+        {
+            'record_id': record_id,
+            'image_index': idx,
+            'filename': filename
+        }
+        for idx, filename in enumerate(record_data.get('images', {}).get('generated', []))
+    ]
+
+    return record_row, page_rows, image_rows
+
+
+def _insert_history_batch(conn, batch: list) -> int:
+    """
+    在当前事务中批量写入一批历史记录（executemany，不提交）
+
+    整批包在一个 SAVEPOINT 中，失败时回滚到该点并改为逐条写入（每条各自一个
+    SAVEPOINT），避免一条坏数据拖垮整批
+
+    Args:
+        conn: 数据库连接（需已开启事务）
+        batch: _build_history_rows 返回值的列表
+
+    Returns:
+        成功写入的记录数
+    """
+    try:
+        with conn.begin_nested():
+            _execute_history_rows(conn, batch)
+        for record_row, _, _ in batch:
+            logger.debug(f"✅ 迁移记录: {record_row['id']} - {record_row['title'][:30]}")
+        return len(batch)
+    except Exception as e:
+        logger.warning(f"⚠️ 批量写入失败，改为逐条写入: {e}")
+
+    migrated_count = 0
+    for rows in batch:
+        record_id = rows[0]['id']
+        try:
+            with conn.begin_nested():
+                _execute_history_rows(conn, [rows])
+            migrated_count += 1
+            logger.debug(f"✅ 迁移记录: {record_id} - {rows[0]['title'][:30]}")
+        except Exception as e:
+            logger.error(f"❌ 迁移记录失败 {record_id}: {e}")
+    return migrated_count
+
+
+def _execute_history_rows(conn, batch: list):
+    """执行批量插入语句（不提交）"""
+    record_rows = [record_row for record_row, _, _ in batch]
+    page_rows = [row for _, pages, _ in batch for row in pages]
+    image_rows = [row for _, _, images in batch for row in images]
+
+    conn.execute(HistoryRecord.__table__.insert(), record_rows)
+    if page_rows:
+        conn.execute(OutlinePage.__table__.insert(), page_rows)
+    if image_rows:
+        conn.execute(TaskImage.__table__.insert(), image_rows)
+
+
 def migrate_history_records():
-    """迁移历史记录"""
+    """
+    迁移历史记录
+
+    Returns:
+        (迁移的记录数, 是否全部成功)；有记录读取或写入失败时第二项为 False
+    """
     project_root = get_project_root()
     history_dir = project_root / 'history'
     index_file = history_dir / 'index.json'
 
     if not index_file.exists():
         logger.info("📁 没有找到 index.json，跳过历史记录迁移")
-        return 0
+        return 0, True
 
     # 检查数据库是否已有数据
     existing_count = HistoryRecord.query.count()
     if existing_count > 0:
         logger.info(f"📊 数据库已有 {existing_count} 条历史记录，跳过迁移")
-        return 0
+        return 0, True
 
     try:
-        with open(index_file, 'r', encoding='utf-8') as f:
-            index_data = json.load(f)
+        index_data = json_utils.load_file(index_file)
     except Exception as e:
         logger.error(f"❌ 读取 index.json 失败: {e}")
-        return 0
+        return 0, False
 
     records = index_data.get('records', [])
     migrated_count = 0
-
-    for record_meta in records:
-        record_id = record_meta.get('id')
-        if not record_id:
-            continue
-
-        # 读取完整记录文件
-        record_file = history_dir / f"{record_id}.json"
-        if not record_file.exists():
-            logger.warning(f"⚠️ 记录文件不存在: {record_file}")
-            continue
-
-        try:
-            with open(record_file, 'r', encoding='utf-8') as f:
-                record_data = json.load(f)
-        except Exception as e:
-            logger.error(f"❌ 读取记录文件失败 {record_file}: {e}")
-            continue
-
-        try:
-            # 创建历史记录
-            history_record = HistoryRecord(
-                id=record_id,
-                title=record_data.get('title', ''),
-                status=record_data.get('status', 'draft'),
-                thumbnail=record_data.get('thumbnail'),
-                task_id=record_data.get('images', {}).get('task_id'),
-                outline_text=record_data.get('outline', {}).get('raw', ''),
-                created_at=datetime.fromisoformat(record_data.get('created_at', datetime.utcnow().isoformat())),
-                updated_at=datetime.fromisoformat(record_data.get('updated_at', datetime.utcnow().isoformat()))
-            )
-            db.session.add(history_record)
-
-            # 创建大纲页面
-            pages = record_data.get('outline', {}).get('pages', [])
-            for page in pages:
-                outline_page = OutlinePage(
-                    record_id=record_id,
-                    page_index=page.get('index', 0),
-                    page_type=page.get('type', 'content'),
-                    content=page.get('content', '')
-                )
-                db.session.add(outline_page)
-
-            # 创建任务图片记录
-            images = record_data.get('images', {}).get('generated', [])
-            for idx, filename in enumerate(images):
-                task_image = TaskImage(
-                    record_id=record_id,
-                    image_index=idx,
-                    filename=filename
-                )
-                db.session.add(task_image)
-
-            db.session.commit()
-            migrated_count += 1
-            logger.debug(f"✅ 迁移记录: {record_id} - {record_data.get('title', '')[:30]}")
-
-        except Exception as e:
-            db.session.rollback()
-            logger.error(f"❌ 迁移记录失败 {record_id}: {e}")
-            continue
-
+    attempted_count = 0
+    ok = True
+
+    with db.engine.connect() as conn, _bulk_load_pragmas(conn):
+        # 整个迁移只用一个事务、只提交一次；每批/每条记录用 SAVEPOINT 隔离失败。
+        # pysqlite 只在 DML 前隐式 BEGIN，这里显式开启，确保 SAVEPOINT 嵌套在同一事务内
+        conn.exec_driver_sql("BEGIN")
+        batch = []
+
+        for record_meta in records:
+            record_id = record_meta.get('id')
+            if not record_id:
+                continue
+
+            # 读取完整记录文件
+            record_file = history_dir / f"{record_id}.json"
+            if not record_file.exists():
+                logger.warning(f"⚠️ 记录文件不存在: {record_file}")
+                ok = False
+                continue
+
+            try:
+                record_data = json_utils.load_file(record_file)
+            except Exception as e:
+                logger.error(f"❌ 读取记录文件失败 {record_file}: {e}")
+                ok = False
+                continue
+
+            try:
+                batch.append(_build_history_rows(record_id, record_data))
+            except Exception as e:
+                logger.error(f"❌ 迁移记录失败 {record_id}: {e}")
+                ok = False
+                continue
+
+            if len(batch) >= MIGRATION_BATCH_SIZE:
+                attempted_count += len(batch)
+                migrated_count += _insert_history_batch(conn, batch)
+                batch = []
+
+        if batch:
+            attempted_count += len(batch)
+            migrated_count += _insert_history_batch(conn, batch)
+
+        conn.commit()
+
+    if migrated_count < attempted_count:
+        ok = False
     logger.info(f"✅ 历史记录迁移完成: 共迁移 {migrated_count} 条记录")
-    return migrated_count
+    return migrated_count, ok
 
 
 def migrate_provider_configs():
-    """迁移服务商配置"""
+    """
+    迁移服务商配置
+
+    Returns:
+        (迁移的配置数, 是否全部成功)；任一配置文件迁移失败时第二项为 False
+    """
     project_root = get_project_root()
 
     # 检查数据库是否已有配置
     existing_count = ProviderConfig.query.count()
     if existing_count > 0:
         logger.info(f"📊 数据库已有 {existing_count} 条配置，跳过迁移")
-        return 0
+        return 0, True
 
     migrated_count = 0
+    ok = True
 
     # 迁移文本服务商配置
     text_config_file = project_root / 'text_providers.yaml'
     if text_config_file.exists():
         try:
             with open(text_config_file, 'r', encoding='utf-8') as f:
-                text_config = yaml.safe_load(f) or {}
+                text_config = yaml.load(f, Loader=YamlLoader) or {}
 
             active_provider = text_config.get('active_provider', '')
             providers = text_config.get('providers', {})
+            rows = []
 
             for name, config in providers.items():
                 # 提取核心字段，其余放入 extra_config
@@ -247,35 +420,37 @@ def migrate_provider_configs():
                     if key in config:
                         extra[key] = config[key]
 
-                provider = ProviderConfig(
-                    category='text',
-                    name=name,
-                    provider_type=config.get('type', 'openai_compatible'),
-                    api_key=config.get('api_key', ''),
-                    base_url=config.get('base_url'),
-                    model=config.get('model'),
-                    is_active=(name == active_provider),
-                    extra_config=json.dumps(extra) if extra else None
-                )
-                db.session.add(provider)
-                migrated_count += 1
-
+                rows.append({
+                    'category': 'text',
+                    'name': name,
+                    'provider_type': config.get('type', 'openai_compatible'),
+                    'api_key': config.get('api_key', ''),
+                    'base_url': config.get('base_url'),
+                    'model': config.get('model'),
+                    'is_active': (name == active_provider),
+                    'extra_config': json_utils.dumps(extra) if extra else None
+                })
+
+            db.session.bulk_insert_mappings(ProviderConfig, rows)
             db.session.commit()
+            migrated_count += len(rows)
             logger.info(f"✅ 文本服务商配置迁移完成: {len(providers)} 个")
 
         except Exception as e:
             db.session.rollback()
             logger.error(f"❌ 迁移文本配置失败: {e}")
+            ok = False
 
     # 迁移图片服务商配置
     image_config_file = project_root / 'image_providers.yaml'
     if image_config_file.exists():
         try:
             with open(image_config_file, 'r', encoding='utf-8') as f:
-                image_config = yaml.safe_load(f) or {}
+                image_config = yaml.load(f, Loader=YamlLoader) or {}
 
             active_provider = image_config.get('active_provider', '')
             providers = image_config.get('providers', {})
+            rows = []
 
             for name, config in providers.items():
                 # 提取核心字段，其余放入 extra_config
@@ -285,27 +460,28 @@ def migrate_provider_configs():
                     if key in config:
                         extra[key] = config[key]
 
-                provider = ProviderConfig(
-                    category='image',
-                    name=name,
-                    provider_type=config.get('type', 'google_genai'),
-                    api_key=config.get('api_key', ''),
-                    base_url=config.get('base_url'),
-                    model=config.get('model'),
-                    is_active=(name == active_provider),
-                    extra_config=json.dumps(extra) if extra else None
-                )
-                db.session.add(provider)
-                migrated_count += 1
-
+                rows.append({
+                    'category': 'image',
+                    'name': name,
+                    'provider_type': config.get('type', 'google_genai'),
+                    'api_key': config.get('api_key', ''),
+                    'base_url': config.get('base_url'),
+                    'model': config.get('model'),
+                    'is_active': (name == active_provider),
+                    'extra_config': json_utils.dumps(extra) if extra else None
+                })
+
+            db.session.bulk_insert_mappings(ProviderConfig, rows)
             db.session.commit()
+            migrated_count += len(rows)
             logger.info(f"✅ 图片服务商配置迁移完成: {len(providers)} 个")
 
         except Exception as e:
             db.session.rollback()
             logger.error(f"❌ 迁移图片配置失败: {e}")
+            ok = False
 
-    return migrated_count
+    return migrated_count, ok
 
 
 def get_or_create_default_user() -> int:
@@ -344,25 +520,29 @@ def migrate_orphan_records():
     Returns:
         迁移的记录数
     """
-    # 检查是否有孤儿记录
-    orphan_history = HistoryRecord.query.filter_by(user_id=None).count()
-    orphan_config = ProviderConfig.query.filter_by(user_id=None).count()
+    from sqlalchemy import exists
+
+    # 检查是否有孤儿记录（EXISTS 命中第一行即返回，无需全表 COUNT）
+    has_orphans = (
+        db.session.query(exists().where(HistoryRecord.user_id.is_(None))).scalar() or
+        db.session.query(exists().where(ProviderConfig.user_id.is_(None))).scalar()
+    )
 
-    if orphan_history == 0 and orphan_config == 0:
+    if not has_orphans:
         logger.info("📊 没有需要关联用户的孤儿记录")
         return 0
 
     # 获取或创建默认用户
     default_user_id = get_or_create_default_user()
 
-    # 更新 HistoryRecord
+    # 更新 HistoryRecord（update 直接返回影响行数）
+    orphan_history = HistoryRecord.query.filter_by(user_id=None).update({'user_id': default_user_id})
     if orphan_history > 0:
-        HistoryRecord.query.filter_by(user_id=None).update({'user_id': default_user_id})
         logger.info(f"✅ 已将 {orphan_history} 条历史记录关联到默认用户")
 
     # 更新 ProviderConfig
+    orphan_config = ProviderConfig.query.filter_by(user_id=None).update({'user_id': default_user_id})
     if orphan_config > 0:
-        ProviderConfig.query.filter_by(user_id=None).update({'user_id': default_user_id})
         logger.info(f"✅ 已将 {orphan_config} 条配置关联到默认用户")
 
     db.session.commit()
@@ -370,17 +550,64 @@ def migrate_orphan_records():
     return orphan_history + orphan_config
 
 
-def check_and_migrate():
+def get_schema_version() -> int:
+    """读取数据库中记录的 schema 版本（PRAGMA user_version，新库为 0）"""
+    from sqlalchemy import text
+
+    return db.session.execute(text("PRAGMA user_version")).scalar() or 0
+
+
+def set_schema_version(version: int):
+    """把 schema 版本写入数据库（PRAGMA user_version）"""
+    from sqlalchemy import text
+
+    # PRAGMA 不支持参数绑定，这里只接受整数
+    db.session.execute(text(f"PRAGMA user_version = {int(version)}"))
+    db.session.commit()
+
+
+def check_and_migrate(force: bool = False):
     """
     检查并执行迁移
 
+    迁移检查的每一步都成功后，才把 MIGRATION_SCHEMA_VERSION 写入数据库的 user_version，
+    之后启动直接跳过（只读一次 PRAGMA）。版本号存在数据库自身，换回旧的数据库文件时会重新检查；
+    有步骤失败时不写版本号，下次启动重试。
+
+    Args:
+        force: 忽略已记录的版本号，强制重新检查
+
     Returns:
         bool: 是否执行了迁移
     """
+    if not force and get_schema_version() >= MIGRATION_SCHEMA_VERSION:
+        logger.debug(f"迁移检查已完成 (v{MIGRATION_SCHEMA_VERSION})，跳过")
+        return False
+
+    migrated, complete = _check_and_migrate()
+
+    if complete:
+        set_schema_version(MIGRATION_SCHEMA_VERSION)
+    else:
+        logger.warning("⚠️ 部分迁移步骤失败，下次启动时将重新检查")
+    return migrated
+
+
+def _check_and_migrate() -> tuple:
+    """
+    执行迁移检查（check_and_migrate 的实际逻辑）
+
+    Returns:
+        (是否执行了迁移, 是否所有步骤都成功)
+    """
     # 首先确保数据库 schema 是最新的
     # 这必须在任何 ORM 查询之前执行
-    ensure_users_table()
-    ensure_user_id_columns()
+    from sqlalchemy import inspect
+
+    inspector = inspect(db.engine)
+    ensure_users_table(inspector)
+    ensure_user_id_columns(inspector)
+    ensure_page_count_column(inspector)
 
     project_root = get_project_root()
 
@@ -398,9 +625,10 @@ def check_and_migrate():
             logger.info(f"✅ 已将 {orphan_migrated} 条记录关联到默认用户")
         else:
             logger.info("📁 没有发现旧数据文件，无需迁移")
-        return orphan_migrated > 0
+        return orphan_migrated > 0, True
 
-    # 检查数据库是否为空
+    # 检查数据库是否为空：任一类已有数据都说明已经在用数据库，不再从旧文件导入
+    # （否则用户删光历史记录后，会把 history/index.json 里的记录重新导入回来）
     history_count = HistoryRecord.query.count()
     config_count = ProviderConfig.query.count()
 
@@ -408,7 +636,7 @@ def check_and_migrate():
         logger.info(f"📊 数据库已有数据 (历史记录: {history_count}, 配置: {config_count})，跳过文件迁移")
         # 即便跳过文件迁移，也要检查是否有孤儿记录
         orphan_migrated = migrate_orphan_records()
-        return orphan_migrated > 0
+        return orphan_migrated > 0, True
 
     logger.info("🚀 开始执行数据迁移...")
 
@@ -416,8 +644,8 @@ def check_and_migrate():
     backup_old_files()
 
     # 迁移数据
-    history_migrated = migrate_history_records()
-    config_migrated = migrate_provider_configs()
+    history_migrated, history_ok = migrate_history_records()
+    config_migrated, config_ok = migrate_provider_configs()
 
     logger.info(f"✅ 迁移完成: 历史记录 {history_migrated} 条, 配置 {config_migrated} 条")
 
@@ -426,7 +654,7 @@ def check_and_migrate():
     if orphan_migrated > 0:
         logger.info(f"✅ 已将 {orphan_migrated} 条记录关联到默认用户")
 
-    return True
+    return True, history_ok and config_ok
 
 
 def run_migration():
@@ -435,7 +663,7 @@ def run_migration():
 
     app = create_app()
     with app.app_context():
-        check_and_migrate()
+        check_and_migrate(force=True)
 
 
 if __name__ == '__main__':
@@ -3,7 +3,8 @@ SQLAlchemy 数据库模型定义
 """
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
-import json
+
+from backend.utils import json_utils
 
 db = SQLAlchemy()
 
@@ -45,26 +46,44 @@ class HistoryRecord(db.Model):
     thumbnail = db.Column(db.String(255), nullable=True)  # 缩略图文件名
     task_id = db.Column(db.String(50), nullable=True, index=True)  # 关联的图片生成任务ID
     outline_text = db.Column(db.Text, nullable=True)  # 原始大纲文本
+    page_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # 页数（写入页面时由服务层一并设置，列表接口直接读该列而不必 COUNT）
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        # 列表页按用户过滤并按创建时间倒序
+        db.Index('ix_history_user_created', user_id, created_at.desc()),
+        # 标题前缀搜索：SQLite 的 LIKE 不区分大小写，只有 NOCASE 排序的索引才能用于 LIKE 'xx%'
+        db.Index('ix_history_title_nocase', title.collate('NOCASE')),
+    )
+
     # 关联关系
-    pages = db.relationship('OutlinePage', backref='record', lazy='dynamic',
-                            cascade='all, delete-orphan', order_by='OutlinePage.page_index')
-    images = db.relationship('TaskImage', backref='record', lazy='dynamic',
-                             cascade='all, delete-orphan')
+    # 加载记录时用一条 IN 查询批量加载（selectin），集合在 SQL 中排好序。
+    # 列表接口不需要关联数据：生产环境用 lazyload('*') 跳过预加载，开发/测试环境用
+    # raiseload('*')（见 services/history.py 的 _strict_load_options），to_index_dict 若访问关联关系会直接报错
+    # passive_deletes：删除记录时子表由外键 ON DELETE CASCADE 清理，不再先查出所有子行逐条删除
+    pages = db.relationship('OutlinePage', backref='record', lazy='selectin',
+                            cascade='all, delete-orphan', passive_deletes=True,
+                            order_by='OutlinePage.page_index')
+    images = db.relationship('TaskImage', backref='record', lazy='selectin',
+                             cascade='all, delete-orphan', passive_deletes=True,
+                             order_by='TaskImage.image_index')
 
     def to_index_dict(self):
-        """转换为索引格式（用于列表展示）"""
+        """
+        转换为索引格式（用于列表展示）
+
+        时间字段直接返回 datetime，由 JSON Provider 序列化为 ISO 8601 字符串
+        """
         return {
             'id': self.id,
             'title': self.title,
             'status': self.status,
             'thumbnail': self.thumbnail,
             'task_id': self.task_id,
-            'page_count': self.pages.count(),
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat()
+            'page_count': self.page_count,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
         }
 
     def to_full_dict(self):
@@ -74,15 +93,15 @@ class HistoryRecord(db.Model):
             'title': self.title,
             'status': self.status,
             'thumbnail': self.thumbnail,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat(),
+            'created_at': self.created_at,
+            'updated_at': self.updated_at,
             'outline': {
                 'raw': self.outline_text or '',
-                'pages': [page.to_dict() for page in self.pages.order_by(OutlinePage.page_index)]
+                'pages': [page.to_dict() for page in self.pages]
             },
             'images': {
                 'task_id': self.task_id,
-                'generated': [img.filename for img in self.images.order_by(TaskImage.image_index)]
+                'generated': [img.filename for img in self.images]
             }
         }
 
@@ -144,11 +163,27 @@ class ProviderConfig(db.Model):
 
     __table_args__ = (
         db.UniqueConstraint('user_id', 'category', 'name', name='uix_user_category_name'),
+        # 按类别查询服务商 / 查找激活的服务商
+        db.Index('ix_provider_cat_active', 'category', 'is_active'),
     )
 
+    @staticmethod
+    def parse_extra(extra_config) -> dict:
+        """解析额外配置 JSON（空值返回空字典）"""
+        return json_utils.loads(extra_config) if extra_config else {}
+
+    @property
+    def extra(self) -> dict:
+        """解析后的额外配置（按原始 JSON 缓存，extra_config 被修改后自动重新解析）"""
+        raw = self.extra_config
+        cached = getattr(self, '_extra_cache', None)
+        if cached is None or cached[0] is not raw:
+            cached = self._extra_cache = (raw, self.parse_extra(raw))
+        return cached[1]
+
     def to_dict(self, mask_key=True):
         """转换为字典"""
-        extra = json.loads(self.extra_config) if self.extra_config else {}
+        extra = self.extra
         result = {
             'type': self.provider_type,
             'api_key': self._mask_api_key(self.api_key) if mask_key else self.api_key,
@@ -165,9 +200,9 @@ class ProviderConfig(db.Model):
 
     @staticmethod
     def _mask_api_key(key):
-        """脱敏 API Key"""
+        """脱敏 API Key（中间固定 8 个星号，不暴露密钥长度）"""
         if not key:
             return ''
         if len(key) <= 8:
-            return '*' * len(key)
-        return key[:4] + '*' * (len(key) - 8) + key[-4:]
+            return '********'
+        return f"{key[:4]}********{key[-4:]}"
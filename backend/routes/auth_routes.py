@@ -9,14 +9,20 @@
 - 刷新 Token
 """
 import logging
+import re
 from datetime import datetime
 
 from flask import Blueprint, request, jsonify
+from sqlalchemy import select
 
 from backend.models import db, User
+from backend.utils.json_utils import static_json_response
 from backend.utils.auth import (
+    hash_password_async,
     hash_password,
     verify_password,
+    verify_dummy_password,
+    password_needs_rehash,
     generate_token,
     jwt_required,
     get_current_user
@@ -24,6 +30,53 @@ from backend.utils.auth import (
 
 logger = logging.getLogger(__name__)
 
+# 固定内容的错误响应（模块加载时序列化一次）
+ERR_USERNAME_EMPTY = static_json_response({'success': False, 'error': '用户名不能为空'}, 400)
+ERR_USERNAME_LENGTH = static_json_response({'success': False, 'error': '用户名长度需在 3-50 个字符之间'}, 400)
+ERR_USERNAME_CONTROL_CHARS = static_json_response({'success': False, 'error': '用户名不能包含控制字符'}, 400)
+ERR_PASSWORD_EMPTY = static_json_response({'success': False, 'error': '密码不能为空'}, 400)
+ERR_PASSWORD_LENGTH = static_json_response({'success': False, 'error': '密码长度不能少于 6 位'}, 400)
+ERR_PASSWORD_TOO_LONG = static_json_response({'success': False, 'error': '密码长度不能超过 128 位'}, 400)
+ERR_USERNAME_TAKEN = static_json_response({'success': False, 'error': '用户名已被使用'}, 400)
+ERR_CREDENTIALS_EMPTY = static_json_response({'success': False, 'error': '用户名和密码不能为空'}, 400)
+ERR_INVALID_CREDENTIALS = static_json_response({'success': False, 'error': '用户名或密码错误'}, 401)
+ERR_ACCOUNT_DISABLED = static_json_response({'success': False, 'error': '账户已被禁用'}, 403)
+
+USERNAME_MIN_LENGTH = 3
+USERNAME_MAX_LENGTH = 50
+# 用户名：3-50 个非控制字符（空值同样不匹配）
+_USERNAME_RE = re.compile(rf'[^\x00-\x1f\x7f]{{{USERNAME_MIN_LENGTH},{USERNAME_MAX_LENGTH}}}')
+PASSWORD_MIN_LENGTH = 6
+PASSWORD_MAX_LENGTH = 128
+
+
+def _validate_registration(username: str, password: str):
+    """
+    校验注册参数
+
+    Args:
+        username: 用户名（已去除首尾空白）
+        password: 密码
+
+    Returns:
+        校验失败时返回错误响应工厂，通过时返回 None
+    """
+    # 合法输入只需一次正则匹配和一次长度比较；不通过时再逐项判断，返回具体的错误提示
+    if _USERNAME_RE.fullmatch(username) and PASSWORD_MIN_LENGTH <= len(password) <= PASSWORD_MAX_LENGTH:
+        return None
+
+    if not username:
+        return ERR_USERNAME_EMPTY
+    if not USERNAME_MIN_LENGTH <= len(username) <= USERNAME_MAX_LENGTH:
+        return ERR_USERNAME_LENGTH
+    if not _USERNAME_RE.fullmatch(username):
+        return ERR_USERNAME_CONTROL_CHARS
+    if not password:
+        return ERR_PASSWORD_EMPTY
+    if len(password) < PASSWORD_MIN_LENGTH:
+        return ERR_PASSWORD_LENGTH
+    return ERR_PASSWORD_TOO_LONG
+
 
 def create_auth_blueprint():
     """创建认证路由蓝图"""
@@ -36,7 +89,7 @@ def create_auth_blueprint():
 
         请求体：
         - username: 用户名（必填，3-50字符）
-        - password: 密码（必填，6位以上）
+        - password: 密码（必填，6-128位）
 
         返回：
         - success: 是否成功
@@ -51,44 +104,26 @@ def create_auth_blueprint():
             username = data.get('username', '').strip()
             password = data.get('password', '')
 
-            # 验证用户名
-            if not username:
-                return jsonify({
-                    'success': False,
-                    'error': '用户名不能为空'
-                }), 400
+            # 验证用户名和密码
+            error = _validate_registration(username, password)
+            if error:
+                return error()
 
-            if len(username) < 3 or len(username) > 50:
-                return jsonify({
-                    'success': False,
-                    'error': '用户名长度需在 3-50 个字符之间'
-                }), 400
+            # 密码哈希在线程池中计算，与下面的用户名查询并行
+            password_hash_future = hash_password_async(password)
 
-            # 验证密码
-            if not password:
-                return jsonify({
-                    'success': False,
-                    'error': '密码不能为空'
-                }), 400
-
-            if len(password) < 6:
-                return jsonify({
-                    'success': False,
-                    'error': '密码长度不能少于 6 位'
-                }), 400
-
-            # 检查用户名是否已存在
-            existing_user = User.query.filter_by(username=username).first()
-            if existing_user:
-                return jsonify({
-                    'success': False,
-                    'error': '用户名已被使用'
-                }), 400
+            # 检查用户名是否已存在（只查主键，不构建 User 对象）
+            username_taken = db.session.execute(
+                select(User.id).where(User.username == username)
+            ).first() is not None
+            if username_taken:
+                password_hash_future.cancel()
+                return ERR_USERNAME_TAKEN()
 
             # 创建用户
             user = User(
                 username=username,
-                password_hash=hash_password(password),
+                password_hash=password_hash_future.result(),
                 is_active=True,
                 created_at=datetime.utcnow()
             )
@@ -137,36 +172,33 @@ def create_auth_blueprint():
             password = data.get('password', '')
 
             if not username or not password:
-                return jsonify({
-                    'success': False,
-                    'error': '用户名和密码不能为空'
-                }), 400
+                return ERR_CREDENTIALS_EMPTY()
 
             # 查找用户
-            user = User.query.filter_by(username=username).first()
+            user = db.session.execute(
+                select(User).where(User.username == username)
+            ).scalar_one_or_none()
 
             if not user:
-                return jsonify({
-                    'success': False,
-                    'error': '用户名或密码错误'
-                }), 401
+                # 仍执行一次哈希校验，保持与密码错误时相同的耗时
+                verify_dummy_password(password)
+                return ERR_INVALID_CREDENTIALS()
 
             # 验证密码
             if not verify_password(password, user.password_hash):
-                return jsonify({
-                    'success': False,
-                    'error': '用户名或密码错误'
-                }), 401
+                return ERR_INVALID_CREDENTIALS()
 
             # 检查账户状态
             if not user.is_active:
-                return jsonify({
-                    'success': False,
-                    'error': '账户已被禁用'
-                }), 403
+                return ERR_ACCOUNT_DISABLED()
+
+            # 旧算法/旧参数的密码哈希在登录成功时升级，与登录时间一起提交
+            if password_needs_rehash(user.password_hash):
+                user.password_hash = hash_password(password)
 
             # 更新最后登录时间
             user.last_login_at = datetime.utcnow()
+            # 提交时 User 的更新事件会自动失效认证缓存中的该用户
             db.session.commit()
 
             # 生成 Token
@@ -8,16 +8,52 @@
 """
 
 import logging
-import json
+import threading
+import uuid
+from functools import lru_cache
+from http.cookiejar import DefaultCookiePolicy
 from typing import Optional
-from flask import Blueprint, request, jsonify
+
+import requests
+from requests.adapters import HTTPAdapter
+from flask import Blueprint, Response, g, request, jsonify
+from sqlalchemy import delete, select, update
 from backend.models import db, ProviderConfig
 from backend.config import Config
+from backend.utils import json_utils
+from backend.utils.json_utils import static_json_response
 from backend.utils.auth import jwt_required, get_current_user_id
-from .utils import prepare_providers_for_response
+from .utils import mask_api_key
 
 logger = logging.getLogger(__name__)
 
+# 连接测试的超时：(连接超时, 读取超时)
+HTTP_TIMEOUT = (5, 30)
+
+# 连接测试共用的 HTTP 会话：复用 TCP 连接和 TLS 会话，重复测试同一服务商时省去握手；
+# 不保存任何 Cookie，避免不同用户的测试请求之间互相影响
+_http = requests.Session()
+_http.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+_http.mount('https://', HTTPAdapter(pool_maxsize=20))
+_http.mount('http://', HTTPAdapter(pool_maxsize=20))
+
+# 固定内容的错误响应（模块加载时序列化一次）
+ERR_MISSING_TYPE = static_json_response({"success": False, "error": "缺少 type 参数"}, 400)
+ERR_API_KEY_MISSING = static_json_response({"success": False, "error": "API Key 未配置"}, 400)
+ERR_CLEAR_NOT_CONFIRMED = static_json_response(
+    {"success": False, "error": "providers 为空会删除该类别的全部服务商，请同时传 clear_providers: true 确认"}, 400
+)
+
+# GET /config 响应体缓存：{user_id: (配置版本, body)}，保存配置时清空
+_config_response_cache = {}
+_config_response_lock = threading.Lock()
+CONFIG_RESPONSE_CACHE_SIZE = 256
+
+# 配置版本：每次保存配置（_clear_config_cache）时递增，ETag 由它得出，命中时不查询数据库；
+# 前缀在进程启动时随机生成，重启后（配置可能已被迁移等修改）客户端缓存的旧 ETag 全部失效
+_config_version = 0
+_CONFIG_ETAG_PREFIX = uuid.uuid4().hex[:8]
+
 
 def create_config_blueprint():
     """创建配置路由蓝图（工厂函数，支持多次调用）"""
@@ -40,29 +76,27 @@ def create_config_blueprint():
         try:
             user_id = get_current_user_id()
 
-            # 从数据库读取图片生成配置
-            image_config = _get_config_from_db('image', user_id=user_id)
-
-            # 从数据库读取文本生成配置
-            text_config = _get_config_from_db('text', user_id=user_id)
+            # 配置版本未变化时：客户端带匹配的 If-None-Match 直接返回 304，否则复用已序列化的响应体，
+            # 两种情况都不查询数据库
+            version = _config_version
+            etag = f"{_CONFIG_ETAG_PREFIX}-{version}"
+            if etag in request.if_none_match:
+                response = Response(status=304)
+            else:
+                cached = _config_response_cache.get(user_id)
+                if cached and cached[0] == version:
+                    body = cached[1]
+                else:
+                    body = json_utils.dumps(_get_full_config_payload(user_id)).encode('utf-8')
+                    with _config_response_lock:
+                        if len(_config_response_cache) >= CONFIG_RESPONSE_CACHE_SIZE:
+                            _config_response_cache.clear()
+                        _config_response_cache[user_id] = (version, body)
+                response = Response(body, mimetype='application/json')
 
-            return jsonify({
-                "success": True,
-                "config": {
-                    "text_generation": {
-                        "active_provider": text_config.get('active_provider', ''),
-                        "providers": prepare_providers_for_response(
-                            text_config.get('providers', {})
-                        )
-                    },
-                    "image_generation": {
-                        "active_provider": image_config.get('active_provider', ''),
-                        "providers": prepare_providers_for_response(
-                            image_config.get('providers', {})
-                        )
-                    }
-                }
-            })
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
 
         except Exception as e:
             logger.error(f"获取配置失败: {e}")
@@ -91,6 +125,11 @@ def create_config_blueprint():
                 data = {}
             user_id = get_current_user_id()
 
+            # 空的 providers 会删除该类别的全部服务商，未显式确认时拒绝整个请求（在写入任何类别之前检查）
+            for key, category in (('image_generation', 'image'), ('text_generation', 'text')):
+                if _is_unconfirmed_clear(category, data.get(key), user_id=user_id):
+                    return ERR_CLEAR_NOT_CONFIRMED()
+
             # 更新图片生成配置
             if 'image_generation' in data:
                 _update_provider_config_in_db('image', data['image_generation'], user_id=user_id)
@@ -109,6 +148,9 @@ def create_config_blueprint():
 
         except Exception as e:
             logger.error(f"更新配置失败: {e}")
+            # 前一个类别可能已经提交，同样使缓存失效
+            db.session.rollback()
+            _clear_config_cache()
             return jsonify({
                 "success": False,
                 "error": f"更新配置失败: {str(e)}"
@@ -142,7 +184,7 @@ def create_config_blueprint():
             user_id = get_current_user_id()
 
             if not provider_type:
-                return jsonify({"success": False, "error": "缺少 type 参数"}), 400
+                return ERR_MISSING_TYPE()
 
             # 构建配置
             config = {
@@ -156,7 +198,7 @@ def create_config_blueprint():
                 config = _load_provider_config_from_db(provider_type, provider_name, config, user_id=user_id)
 
             if not config['api_key']:
-                return jsonify({"success": False, "error": "API Key 未配置"}), 400
+                return ERR_API_KEY_MISSING()
 
             # 根据类型执行测试
             result = _test_provider_connection(provider_type, config)
@@ -170,58 +212,97 @@ def create_config_blueprint():
 
 # ==================== 数据库辅助函数 ====================
 
-def _get_config_from_db(category: str, user_id: Optional[int] = None) -> dict:
+def _get_providers(category: str, user_id: Optional[int] = None) -> list:
     """
-    从数据库获取配置
+    获取某类别的服务商记录（请求级缓存）
+
+    缓存挂在 flask.g 上，只在当前请求内有效；同一请求内重复读取同一类别不再查询数据库
 
     Args:
         category: 配置类别 ('text' 或 'image')
         user_id: 用户ID（用于过滤用户数据）
 
     Returns:
-        配置字典
+        ProviderConfig 列表
     """
-    query = ProviderConfig.query.filter_by(category=category)
-    if user_id is not None:
-        query = query.filter_by(user_id=user_id)
+    cache = g.setdefault('_provider_cache', {})
+    key = (category, user_id)
+    if key not in cache:
+        stmt = select(ProviderConfig).where(ProviderConfig.category == category)
+        if user_id is not None:
+            stmt = stmt.where(ProviderConfig.user_id == user_id)
+        cache[key] = db.session.execute(stmt).scalars().all()
+    return cache[key]
 
-    providers = query.all()
 
-    if not providers:
-        return {
-            'active_provider': '',
-            'providers': {}
-        }
+def _get_full_config_payload(user_id: Optional[int] = None) -> dict:
+    """
+    构建 GET /config 的响应内容
 
-    result = {
-        'active_provider': '',
-        'providers': {}
+    一次查询取出用户全部服务商，按类别直接组装成响应结构（API Key 已脱敏）
+
+    Args:
+        user_id: 用户ID（用于过滤用户数据）
+
+    Returns:
+        响应字典
+    """
+    stmt = select(ProviderConfig).order_by(ProviderConfig.id)
+    if user_id is not None:
+        stmt = stmt.where(ProviderConfig.user_id == user_id)
+
+    sections = {
+        'text': {'active_provider': '', 'providers': {}},
+        'image': {'active_provider': '', 'providers': {}},
     }
 
-    for p in providers:
-        if p.is_active:
-            result['active_provider'] = p.name
+    for p in db.session.execute(stmt).scalars():
+        section = sections.get(p.category)
+        if section is None:
+            continue
 
-        # 解析额外配置
-        extra = json.loads(p.extra_config) if p.extra_config else {}
+        if p.is_active:
+            section['active_provider'] = p.name
 
-        # 构建服务商配置
+        # 构建服务商配置（不返回实际 API Key，前端用空字符串表示"不修改"）
         provider_config = {
             'type': p.provider_type,
-            'api_key': p.api_key or '',
+            'api_key': '',
             'model': p.model,
-            **extra
+            **p.extra
         }
-
         if p.base_url:
             provider_config['base_url'] = p.base_url
+        provider_config['api_key_masked'] = mask_api_key(p.api_key) if p.api_key else ''
 
         # 移除空值
-        provider_config = {k: v for k, v in provider_config.items() if v is not None}
+        section['providers'][p.name] = {k: v for k, v in provider_config.items() if v is not None}
+
+    return {
+        "success": True,
+        "config": {
+            "text_generation": sections['text'],
+            "image_generation": sections['image']
+        }
+    }
+
 
-        result['providers'][p.name] = provider_config
+def _is_unconfirmed_clear(category: str, new_data, user_id: Optional[int] = None) -> bool:
+    """
+    提交的配置是否会在未确认的情况下清空整个类别
 
-    return result
+    providers 为空、该类别已有服务商且未传 clear_providers 时成立
+
+    Args:
+        category: 配置类别 ('text' 或 'image')
+        new_data: 提交的该类别配置
+        user_id: 用户ID（用于过滤用户数据）
+    """
+    if not isinstance(new_data, dict) or 'providers' not in new_data:
+        return False
+    if new_data['providers'] or new_data.get('clear_providers'):
+        return False
+    return bool(_get_providers(category, user_id=user_id))
 
 
 def _update_provider_config_in_db(category: str, new_data: dict, user_id: Optional[int] = None):
@@ -236,29 +317,26 @@ def _update_provider_config_in_db(category: str, new_data: dict, user_id: Option
     # 更新 active_provider
     new_active = new_data.get('active_provider', '')
 
-    # 先将所有服务商设为非激活
-    if new_active:
-        query = ProviderConfig.query.filter_by(category=category)
-        if user_id is not None:
-            query = query.filter_by(user_id=user_id)
-        query.update({'is_active': False})
-
-        # 激活指定的服务商
-        activate_query = ProviderConfig.query.filter_by(category=category, name=new_active)
+    # 提交了非空 providers 时，下面的循环会逐行写入 is_active（未提交的服务商会被删除），
+    # 只有单独切换激活服务商时才需要 UPDATE：一条语句同时完成取消和设置激活
+    if new_active and not new_data.get('providers'):
+        stmt = update(ProviderConfig).where(
+            ProviderConfig.category == category
+        ).values(is_active=(ProviderConfig.name == new_active))
         if user_id is not None:
-            activate_query = activate_query.filter_by(user_id=user_id)
-        activate_query.update({'is_active': True})
+            stmt = stmt.where(ProviderConfig.user_id == user_id)
+        db.session.execute(stmt)
 
     # 更新 providers
     if 'providers' in new_data:
         new_providers = new_data['providers']
 
+        # 一次查询取出该类别现有的服务商，避免逐个 SELECT
+        existing_by_name = {p.name: p for p in _get_providers(category, user_id=user_id)}
+        new_rows = []
+
         for name, provider_config in new_providers.items():
-            # 查找现有记录
-            existing_query = ProviderConfig.query.filter_by(category=category, name=name)
-            if user_id is not None:
-                existing_query = existing_query.filter_by(user_id=user_id)
-            existing = existing_query.first()
+            existing = existing_by_name.get(name)
 
             # 处理 API Key：如果是空值，保留原有的
             api_key = provider_config.get('api_key')
@@ -287,10 +365,10 @@ def _update_provider_config_in_db(category: str, new_data: dict, user_id: Option
                 existing.base_url = base_url
                 existing.model = model
                 existing.is_active = is_active
-                existing.extra_config = json.dumps(extra) if extra else None
+                existing.extra_config = json_utils.dumps(extra) if extra else None
             else:
-                # 创建新记录
-                new_provider = ProviderConfig(
+                # 新记录先收集，最后一次性加入会话（flush 时合并为批量 INSERT）
+                new_rows.append(ProviderConfig(
                     category=category,
                     name=name,
                     provider_type=provider_type,
@@ -299,19 +377,21 @@ def _update_provider_config_in_db(category: str, new_data: dict, user_id: Option
                     model=model,
                     is_active=is_active,
                     user_id=user_id,
-                    extra_config=json.dumps(extra) if extra else None
-                )
-                db.session.add(new_provider)
-
-        # 删除不在新配置中的服务商
-        existing_names = set(new_providers.keys())
-        delete_query = ProviderConfig.query.filter(
-            ProviderConfig.category == category,
-            ~ProviderConfig.name.in_(existing_names)
-        )
-        if user_id is not None:
-            delete_query = delete_query.filter(ProviderConfig.user_id == user_id)
-        delete_query.delete(synchronize_session=False)
+                    extra_config=json_utils.dumps(extra) if extra else None
+                ))
+
+        db.session.add_all(new_rows)
+
+        # 删除不在新配置中的服务商：差集在内存中计算，DELETE 只带需要删除的少量名称
+        to_delete = [name for name in existing_by_name if name not in new_providers]
+        if to_delete:
+            stmt = delete(ProviderConfig).where(
+                ProviderConfig.category == category,
+                ProviderConfig.name.in_(to_delete)
+            )
+            if user_id is not None:
+                stmt = stmt.where(ProviderConfig.user_id == user_id)
+            db.session.execute(stmt.execution_options(synchronize_session=False))
 
     db.session.commit()
 
@@ -335,10 +415,10 @@ def _load_provider_config_from_db(provider_type: str, provider_name: str, config
     else:
         category = 'image'
 
-    query = ProviderConfig.query.filter_by(category=category, name=provider_name)
-    if user_id is not None:
-        query = query.filter_by(user_id=user_id)
-    provider = query.first()
+    provider = next(
+        (p for p in _get_providers(category, user_id=user_id) if p.name == provider_name),
+        None
+    )
 
     if provider:
         config['api_key'] = provider.api_key
@@ -352,7 +432,14 @@ def _load_provider_config_from_db(provider_type: str, provider_name: str, config
 
 
 def _clear_config_cache():
-    """清除配置缓存"""
+    """清除配置缓存（同时递增配置版本，使客户端缓存的 ETag 失效）"""
+    global _config_version
+    g.pop('_provider_cache', None)
+    _get_genai_client.cache_clear()
+    with _config_response_lock:
+        _config_version += 1
+        _config_response_cache.clear()
+
     try:
         Config.reload_config()
     except Exception:
@@ -364,6 +451,9 @@ def _clear_config_cache():
     except Exception:
         pass
 
+    from backend.services.outline import clear_text_config_cache
+    clear_text_config_cache()
+
 
 # ==================== 连接测试函数 ====================
 
@@ -396,19 +486,39 @@ def _test_provider_connection(provider_type: str, config: dict) -> dict:
         raise ValueError(f"不支持的类型: {provider_type}")
 
 
-def _test_google_genai(config: dict) -> dict:
-    """测试 Google GenAI 图片生成服务"""
+@lru_cache(maxsize=32)
+def _get_genai_client(api_key: str, base_url: Optional[str] = None):
+    """
+    获取 Google GenAI 客户端（按 API Key 和 Base URL 缓存复用，避免每次测试都重新建立连接）
+
+    Args:
+        api_key: API Key
+        base_url: 自定义 Base URL；为空时使用 Vertex AI
+
+    Returns:
+        genai.Client 实例
+    """
     from google import genai
 
-    if config.get('base_url'):
-        client = genai.Client(
-            api_key=config['api_key'],
+    if base_url:
+        return genai.Client(
+            api_key=api_key,
             http_options={
-                'base_url': config['base_url'],
+                'base_url': base_url,
                 'api_version': 'v1beta'
             },
             vertexai=False
         )
+    return genai.Client(
+        api_key=api_key,
+        vertexai=True
+    )
+
+
+def _test_google_genai(config: dict) -> dict:
+    """测试 Google GenAI 图片生成服务"""
+    if config.get('base_url'):
+        client = _get_genai_client(config['api_key'], config['base_url'])
         try:
             list(client.models.list())
             return {
@@ -426,22 +536,7 @@ def _test_google_genai(config: dict) -> dict:
 
 def _test_google_gemini(config: dict, test_prompt: str) -> dict:
     """测试 Google Gemini 文本生成服务"""
-    from google import genai
-
-    if config.get('base_url'):
-        client = genai.Client(
-            api_key=config['api_key'],
-            http_options={
-                'base_url': config['base_url'],
-                'api_version': 'v1beta'
-            },
-            vertexai=False
-        )
-    else:
-        client = genai.Client(
-            api_key=config['api_key'],
-            vertexai=True
-        )
+    client = _get_genai_client(config['api_key'], config.get('base_url') or None)
 
     model = config.get('model') or 'gemini-2.0-flash-exp'
     response = client.models.generate_content(
@@ -455,8 +550,6 @@ def _test_google_gemini(config: dict, test_prompt: str) -> dict:
 
 def _test_openai_compatible(config: dict, test_prompt: str) -> dict:
     """测试 OpenAI 兼容接口"""
-    import requests
-
     base_url = config['base_url'].rstrip('/').rstrip('/v1') if config.get('base_url') else 'https://api.openai.com'
     url = f"{base_url}/v1/chat/completions"
 
@@ -466,14 +559,14 @@ def _test_openai_compatible(config: dict, test_prompt: str) -> dict:
         "max_tokens": 50
     }
 
-    response = requests.post(
+    response = _http.post(
         url,
         headers={
             'Authorization': f"Bearer {config['api_key']}",
             'Content-Type': 'application/json'
         },
         json=payload,
-        timeout=30
+        timeout=HTTP_TIMEOUT
     )
 
     if response.status_code != 200:
@@ -487,15 +580,13 @@ def _test_openai_compatible(config: dict, test_prompt: str) -> dict:
 
 def _test_image_api(config: dict) -> dict:
     """测试图片 API 连接"""
-    import requests
-
     base_url = config['base_url'].rstrip('/').rstrip('/v1') if config.get('base_url') else 'https://api.openai.com'
     url = f"{base_url}/v1/models"
 
-    response = requests.get(
+    response = _http.get(
         url,
         headers={'Authorization': f"Bearer {config['api_key']}"},
-        timeout=30
+        timeout=HTTP_TIMEOUT
     )
 
     if response.status_code == 200:
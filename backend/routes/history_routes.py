@@ -272,6 +272,7 @@ def create_history_blueprint():
 
         查询参数：
         - keyword: 搜索关键词（必填）
+        - mode: 匹配方式（可选），substring（默认，标题包含关键词）或 prefix（标题以关键词开头）
 
         返回：
         - success: 是否成功
@@ -279,6 +280,7 @@ def create_history_blueprint():
         """
         try:
             keyword = request.args.get('keyword', '')
+            mode = request.args.get('mode', 'substring')
 
             if not keyword:
                 return jsonify({
@@ -286,9 +288,15 @@ def create_history_blueprint():
                     "error": "参数错误：keyword 不能为空。\n请提供搜索关键词。"
                 }), 400
 
+            if mode not in ('substring', 'prefix'):
+                return jsonify({
+                    "success": False,
+                    "error": "参数错误：mode 只能是 substring 或 prefix。"
+                }), 400
+
             user_id = get_current_user_id()
             history_service = get_history_service()
-            results = history_service.search_records(keyword, user_id=user_id)
+            results = history_service.search_records(keyword, user_id=user_id, mode=mode)
 
             return jsonify({
                 "success": True,
@@ -52,7 +52,7 @@ def log_error(endpoint: str, error: Exception):
 
 def mask_api_key(key: str) -> str:
     """
-    遮盖 API Key，只显示前4位和后4位
+    遮盖 API Key，只显示前4位和后4位，中间固定为 8 个星号（不暴露密钥长度）
 
     Args:
         key: 原始 API Key
@@ -63,35 +63,6 @@ def mask_api_key(key: str) -> str:
     if not key:
         return ''
     if len(key) <= 8:
-        return '*' * len(key)
-    return key[:4] + '*' * (len(key) - 8) + key[-4:]
+        return '********'
+    return f"{key[:4]}********{key[-4:]}"
 
-
-def prepare_providers_for_response(providers: dict) -> dict:
-    """
-    准备返回给前端的 providers 数据
-
-    将 api_key 替换为脱敏版本，避免泄露
-
-    Args:
-        providers: 原始服务商配置字典
-
-    Returns:
-        dict: 处理后的服务商配置
-    """
-    result = {}
-    for name, config in providers.items():
-        provider_copy = config.copy()
-
-        # 返回脱敏的 api_key
-        if 'api_key' in provider_copy and provider_copy['api_key']:
-            provider_copy['api_key_masked'] = mask_api_key(provider_copy['api_key'])
-            # 不返回实际值，前端用空字符串表示"不修改"
-            provider_copy['api_key'] = ''
-        else:
-            provider_copy['api_key_masked'] = ''
-            provider_copy['api_key'] = ''
-
-        result[name] = provider_copy
-
-    return result
@@ -2,21 +2,153 @@
 历史记录服务 - SQLAlchemy 实现
 """
 import os
+import re
 import shutil
 import uuid
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Dict, List, Optional, Any
 from pathlib import Path
 
+from flask import current_app
+from sqlalchemy import func
+from sqlalchemy.orm import lazyload, raiseload, selectinload
+
 from backend.models import db, HistoryRecord, OutlinePage, TaskImage
 
 logger = logging.getLogger(__name__)
 
 
+def _strict_load_options(*eager) -> list:
+    """
+    历史记录查询的加载选项
+
+    只预加载显式列出的关系，其余关系一律不加载。开发/测试环境下禁止一切隐式懒加载，
+    序列化时意外访问未预加载的关系会直接报错，避免 N+1 查询悄悄回归；生产环境保留懒加载兜底
+
+    Args:
+        eager: 需要用 selectinload 批量预加载的关系
+
+    Returns:
+        传给 query.options() 的选项列表
+    """
+    options = [selectinload(rel) for rel in eager]
+    if current_app.debug or current_app.testing:
+        options.append(raiseload('*'))
+    else:
+        options.append(lazyload('*'))
+    return options
+
+
+# 图片文件名开头的页码（如 "3.png" 中的 3）
+_LEAD_NUM = re.compile(r'(\d+)\.')
+
+
+def _image_sort_key(filename: str) -> tuple:
+    """
+    图片文件的排序键：按页码数字排序，无法识别页码的排在最后，页码相同时按文件名排序
+
+    Args:
+        filename: 图片文件名
+
+    Returns:
+        (页码, 文件名)
+    """
+    match = _LEAD_NUM.match(filename)
+    return (int(match.group(1)) if match else 999, filename)
+
+
+def _scan_task_images(task_dir: str) -> List[str]:
+    """
+    扫描任务目录下的图片文件（排除缩略图），按页码排序；只读文件系统，可在线程池中执行
+
+    Args:
+        task_dir: 任务目录路径
+
+    Returns:
+        排好序的图片文件名列表
+    """
+    # DirEntry 自带文件类型，无需逐个 stat
+    with os.scandir(task_dir) as it:
+        image_files = [
+            entry.name for entry in it
+            if not entry.name.startswith('thumb_')
+            and entry.name.endswith(('.png', '.jpg', '.jpeg'))
+            and entry.is_file()
+        ]
+
+    # 按文件名排序（数字排序）
+    image_files.sort(key=_image_sort_key)
+    return image_files
+
+
+def _build_page_rows(record_id: str, pages: List[Dict]) -> List[Dict]:
+    """
+    将大纲页面转换为批量插入的行数据
+
+    Args:
+        record_id: 记录ID
+        pages: 大纲页面列表
+
+    Returns:
+        outline_pages 行数据列表
+    """
+    return [
+        {
+            'record_id': record_id,
+            'page_index': page.get('index', 0),
+            'page_type': page.get('type', 'content'),
+            'content': page.get('content', '')
+        }
+        for page in pages
+    ]
+
+
+def _sync_child_rows(model, index_column: str, rows_by_record: Dict[str, List[Dict]]) -> None:
+    """
+    按序号对比记录的子表行，只写入有变化的部分（支持一次处理多条记录）
+
+    已存在的序号原地更新（内容未变则不产生写入），新增的序号批量插入，
+    不再出现的序号一次性删除
+
+    Args:
+        model: 子表模型（OutlinePage / TaskImage）
+        index_column: 序号列名
+        rows_by_record: {记录ID: 新的行数据列表}
+    """
+    existing = {
+        (obj.record_id, getattr(obj, index_column)): obj
+        for obj in model.query.filter(model.record_id.in_(rows_by_record.keys()))
+    }
+
+    new_rows = []
+    for record_id, rows in rows_by_record.items():
+        for row in rows:
+            obj = existing.pop((record_id, row[index_column]), None)
+            if obj is None:
+                new_rows.append(row)
+                continue
+            for key, value in row.items():
+                if getattr(obj, key) != value:
+                    setattr(obj, key, value)
+
+    # 剩下的是新数据中已不存在的序号
+    if existing:
+        model.query.filter(
+            model.id.in_([obj.id for obj in existing.values()])
+        ).delete(synchronize_session=False)
+
+    if new_rows:
+        db.session.bulk_insert_mappings(model, new_rows)
+
+
 class HistoryService:
     """历史记录服务类"""
 
+    # 批量扫描任务目录时的文件系统扫描线程数
+    SCAN_MAX_WORKERS = 8
+
     def __init__(self):
         self.history_dir = os.path.join(
             os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
@@ -57,20 +189,15 @@ class HistoryService:
             created_at=now,
             updated_at=now
         )
-        db.session.add(record)
-
-        # 创建大纲页面
-        pages = outline.get('pages', [])
-        for page in pages:
-            outline_page = OutlinePage(
-                record_id=record_id,
-                page_index=page.get('index', 0),
-                page_type=page.get('type', 'content'),
-                content=page.get('content', '')
-            )
-            db.session.add(outline_page)
+        page_rows = _build_page_rows(record_id, outline.get('pages', []))
+        record.page_count = len(page_rows)
 
         try:
+            # 先写入记录本身（页面外键依赖它），再用一条多行 INSERT 写入全部页面
+            db.session.add(record)
+            db.session.flush()
+            if page_rows:
+                db.session.bulk_insert_mappings(OutlinePage, page_rows)
             db.session.commit()
             logger.info(f"✅ 创建历史记录: {record_id}")
         except Exception as e:
@@ -91,7 +218,11 @@ class HistoryService:
         Returns:
             记录详情字典，不存在或无权限则返回 None
         """
-        record = HistoryRecord.query.get(record_id)
+        # 页面和图片各用一条 IN 查询批量加载，其余关系不加载
+        record = db.session.get(
+            HistoryRecord, record_id,
+            options=_strict_load_options(HistoryRecord.pages, HistoryRecord.images)
+        )
         if not record:
             return None
         # 验证用户权限
@@ -122,7 +253,8 @@ class HistoryService:
         Returns:
             是否更新成功
         """
-        record = HistoryRecord.query.get(record_id)
+        # 页面和图片按序号单独查询对比，不需要预加载
+        record = db.session.get(HistoryRecord, record_id, options=[lazyload('*')])
         if not record:
             return False
 
@@ -135,16 +267,10 @@ class HistoryService:
 
             if outline is not None:
                 record.outline_text = outline.get('raw', '')
-                # 删除旧的页面，创建新的
-                OutlinePage.query.filter_by(record_id=record_id).delete()
-                for page in outline.get('pages', []):
-                    outline_page = OutlinePage(
-                        record_id=record_id,
-                        page_index=page.get('index', 0),
-                        page_type=page.get('type', 'content'),
-                        content=page.get('content', '')
-                    )
-                    db.session.add(outline_page)
+                # 只更新有变化的页面，新增的批量写入，多余的删除
+                page_rows = _build_page_rows(record_id, outline.get('pages', []))
+                _sync_child_rows(OutlinePage, 'page_index', {record_id: page_rows})
+                record.page_count = len(page_rows)
 
             if images is not None:
                 task_id = images.get('task_id')
@@ -159,18 +285,15 @@ class HistoryService:
                     if not isinstance(generated, list):
                         generated = []
 
-                    # 删除旧的图片记录
-                    TaskImage.query.filter_by(record_id=record_id).delete()
-
-                    # 创建新的图片记录
-                    for idx, filename in enumerate(generated):
-                        safe_name = '' if filename is None else str(filename)
-                        task_image = TaskImage(
-                            record_id=record_id,
-                            image_index=idx,
-                            filename=safe_name
-                        )
-                        db.session.add(task_image)
+                    image_rows = [
+                        {
+                            'record_id': record_id,
+                            'image_index': idx,
+                            'filename': '' if filename is None else str(filename)
+                        }
+                        for idx, filename in enumerate(generated)
+                    ]
+                    _sync_child_rows(TaskImage, 'image_index', {record_id: image_rows})
 
             if status is not None:
                 record.status = status
@@ -198,7 +321,8 @@ class HistoryService:
         Returns:
             是否删除成功
         """
-        record = HistoryRecord.query.get(record_id)
+        # 不预加载页面和图片，删除时由数据库外键级联清理
+        record = db.session.get(HistoryRecord, record_id, options=[lazyload('*')])
         if not record:
             return False
 
@@ -217,7 +341,7 @@ class HistoryService:
                     logger.warning(f"删除任务目录失败: {task_dir}, {e}")
 
         try:
-            # 级联删除会自动删除关联的 pages 和 images
+            # 只发出一条 DELETE，关联的 pages 和 images 由 ON DELETE CASCADE 删除
             db.session.delete(record)
             db.session.commit()
             logger.info(f"✅ 删除历史记录: {record_id}")
@@ -246,7 +370,7 @@ class HistoryService:
         Returns:
             分页结果
         """
-        query = HistoryRecord.query
+        query = HistoryRecord.query.options(*_strict_load_options())
 
         # 按用户过滤
         if user_id is not None:
@@ -258,41 +382,64 @@ class HistoryService:
         # 按创建时间倒序
         query = query.order_by(HistoryRecord.created_at.desc())
 
-        # 获取总数
-        total = query.count()
+        # 分页：多取一条判断是否还有下一页
+        offset = (page - 1) * page_size
+        records = query.offset(offset).limit(page_size + 1).all()
+        has_more = len(records) > page_size
+        records = records[:page_size]
 
-        # 分页
-        records = query.offset((page - 1) * page_size).limit(page_size).all()
+        # 已经到最后一页时总数可以直接算出，只有后面还有数据（或页码越界）时才需要 COUNT
+        if records and not has_more:
+            total = offset + len(records)
+        elif not records and page == 1:
+            total = 0
+        else:
+            total = query.order_by(None).count()
 
         return {
             "records": [r.to_index_dict() for r in records],
             "total": total,
             "page": page,
             "page_size": page_size,
-            "total_pages": (total + page_size - 1) // page_size
+            "total_pages": (total + page_size - 1) // page_size,
+            "has_more": has_more
         }
 
-    def search_records(self, keyword: str, user_id: Optional[int] = None) -> List[Dict]:
+    def search_records(
+        self,
+        keyword: str,
+        user_id: Optional[int] = None,
+        mode: str = 'substring'
+    ) -> List[Dict]:
         """
         搜索历史记录
 
         Args:
             keyword: 搜索关键词
             user_id: 用户ID（可选，用于过滤用户数据）
+            mode: 匹配方式，substring 为标题包含关键词，prefix 为标题以关键词开头（可走标题索引）
 
         Returns:
             匹配的记录列表
+
+        Raises:
+            ValueError: 不支持的匹配方式
         """
-        query = HistoryRecord.query.filter(
-            HistoryRecord.title.ilike(f'%{keyword}%')
-        )
+        if mode == 'prefix':
+            # SQLite 的 LIKE 本身不区分大小写，配合 ix_history_title_nocase 索引做范围查找
+            title_filter = HistoryRecord.title.like(f'{keyword}%')
+        elif mode == 'substring':
+            title_filter = HistoryRecord.title.ilike(f'%{keyword}%')
+        else:
+            raise ValueError(f"不支持的搜索方式: {mode}")
+
+        query = HistoryRecord.query.options(*_strict_load_options()).filter(title_filter)
 
         # 按用户过滤
         if user_id is not None:
             query = query.filter_by(user_id=user_id)
 
         records = query.order_by(HistoryRecord.created_at.desc()).all()
-
         return [r.to_index_dict() for r in records]
 
     def get_statistics(self, user_id: Optional[int] = None) -> Dict:
@@ -314,7 +461,6 @@ class HistoryService:
         total = query.count()
 
         # 按状态分组统计
-        from sqlalchemy import func
         base_query = db.session.query(
             HistoryRecord.status,
             func.count(HistoryRecord.id)
@@ -351,72 +497,112 @@ class HistoryService:
             }
 
         try:
-            # 扫描目录下所有图片文件（排除缩略图）
-            image_files = []
-            for filename in os.listdir(task_dir):
-                if filename.startswith('thumb_'):
-                    continue
-                if filename.endswith(('.png', '.jpg', '.jpeg')):
-                    image_files.append(filename)
-
-            # 按文件名排序（数字排序）
-            def get_index(filename):
-                try:
-                    return int(filename.split('.')[0])
-                except:
-                    return 999
+            # 查找关联的历史记录
+            record = HistoryRecord.query.options(lazyload('*')).filter_by(task_id=task_id).first()
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"扫描任务失败: {str(e)}"
+            }
 
-            image_files.sort(key=get_index)
+        return self._sync_with_record(task_id, record)
 
-            # 查找关联的历史记录
-            record = HistoryRecord.query.filter_by(task_id=task_id).first()
+    def _sync_with_record(self, task_id: str, record: Optional[HistoryRecord]) -> Dict[str, Any]:
+        """
+        扫描任务文件夹并同步到已查出的历史记录（调用方负责查询记录）
 
-            if record:
-                # 判断状态
-                expected_count = record.pages.count()
-                actual_count = len(image_files)
+        Args:
+            task_id: 任务ID
+            record: 关联的历史记录，没有关联记录时为 None
 
-                if actual_count == 0:
-                    status = "draft"
-                elif actual_count >= expected_count:
-                    status = "completed"
-                else:
-                    status = "partial"
-
-                # 更新记录
-                self.update_record(
-                    record.id,
-                    images={
-                        "task_id": task_id,
-                        "generated": image_files
-                    },
-                    status=status,
-                    thumbnail=image_files[0] if image_files else None
-                )
-
-                return {
+        Returns:
+            扫描结果
+        """
+        try:
+            image_files = _scan_task_images(os.path.join(self.history_dir, task_id))
+            return self._apply_scans([(task_id, record, image_files)])[0]
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"扫描任务失败: {str(e)}"
+            }
+
+    def _apply_scans(self, scans: List[tuple]) -> List[Dict[str, Any]]:
+        """
+        把扫描到的图片列表批量同步到历史记录（只操作数据库，所有记录在一个事务中提交）
+
+        Args:
+            scans: [(任务ID, 关联的历史记录或 None, 排好序的图片文件名列表)]
+
+        Returns:
+            与 scans 一一对应的扫描结果列表
+        """
+        results = []
+        image_rows_by_record = {}
+        now = datetime.utcnow()
+
+        for task_id, record, image_files in scans:
+            if record is None:
+                # 没有关联的记录
+                results.append({
                     "success": True,
-                    "record_id": record.id,
                     "task_id": task_id,
                     "images_count": len(image_files),
                     "images": image_files,
-                    "status": status
+                    "no_record": True
+                })
+                continue
+
+            # 判断状态
+            actual_count = len(image_files)
+            if actual_count == 0:
+                status = "draft"
+            elif actual_count >= record.page_count:
+                status = "completed"
+            else:
+                status = "partial"
+
+            # 记录已在会话中，直接修改属性，提交时统一 UPDATE
+            record.task_id = task_id
+            record.status = status
+            record.updated_at = now
+            if image_files:
+                record.thumbnail = image_files[0]
+
+            image_rows_by_record[record.id] = [
+                {
+                    'record_id': record.id,
+                    'image_index': idx,
+                    'filename': filename
                 }
+                for idx, filename in enumerate(image_files)
+            ]
 
-            # 没有关联的记录
-            return {
+            results.append({
                 "success": True,
+                "record_id": record.id,
                 "task_id": task_id,
-                "images_count": len(image_files),
+                "images_count": actual_count,
                 "images": image_files,
-                "no_record": True
-            }
+                "status": status
+            })
+
+        if not image_rows_by_record:
+            return results
 
+        try:
+            _sync_child_rows(TaskImage, 'image_index', image_rows_by_record)
+            db.session.commit()
         except Exception as e:
-            return {
-                "success": False,
-                "error": f"扫描任务失败: {str(e)}"
-            }
+            db.session.rollback()
+            logger.error(f"❌ 同步任务图片失败: {e}")
+            # 整个事务已回滚，所有关联了记录的任务都算失败
+            return [
+                {"success": False, "error": f"扫描任务失败: {str(e)}"} if "record_id" in result else result
+                for result in results
+            ]
+
+        return results
 
     def scan_all_tasks(self) -> Dict[str, Any]:
         """
@@ -435,20 +621,50 @@ class HistoryService:
             synced_count = 0
             failed_count = 0
             orphan_tasks = []
-            results = []
 
-            # 遍历 history 目录
-            for item in os.listdir(self.history_dir):
-                item_path = os.path.join(self.history_dir, item)
+            # 遍历 history 目录，只处理目录（任务文件夹）
+            with os.scandir(self.history_dir) as it:
+                task_ids = [entry.name for entry in it if entry.is_dir()]
 
-                # 只处理目录（任务文件夹）
-                if not os.path.isdir(item_path):
-                    continue
-
-                task_id = item
-                result = self.scan_and_sync_task_images(task_id)
-                results.append(result)
+            def scan(task_id):
+                try:
+                    return _scan_task_images(os.path.join(self.history_dir, task_id)), None
+                except Exception as e:
+                    return None, e
+
+            # 线程池按需创建线程，任务目录少时不会启动多余的线程
+            with ThreadPoolExecutor(max_workers=self.SCAN_MAX_WORKERS, thread_name_prefix='history-scan') as executor:
+                # 各任务目录的文件扫描在线程池中并行执行，同时在当前线程查询数据库
+                scanned = executor.map(scan, task_ids)
+
+                # 一次 IN 查询取出所有任务的关联记录，避免每个目录各查一次
+                records_by_task = {}
+                if task_ids:
+                    records_by_task = {
+                        r.task_id: r
+                        for r in HistoryRecord.query.options(lazyload('*')).filter(
+                            HistoryRecord.task_id.in_(task_ids)
+                        ).all()
+                    }
+                scanned = list(scanned)
+
+            # 数据库更新统一在当前线程（请求的会话）中执行，所有记录一次提交
+            results = [None] * len(task_ids)
+            scans = []
+            scan_positions = []
+            for pos, (task_id, (image_files, error)) in enumerate(zip(task_ids, scanned)):
+                if error is not None:
+                    results[pos] = {
+                        "success": False,
+                        "error": f"扫描任务失败: {str(error)}"
+                    }
+                else:
+                    scans.append((task_id, records_by_task.get(task_id), image_files))
+                    scan_positions.append(pos)
+            for pos, result in zip(scan_positions, self._apply_scans(scans)):
+                results[pos] = result
 
+            for task_id, result in zip(task_ids, results):
                 if result.get("success"):
                     if result.get("no_record"):
                         orphan_tasks.append(task_id)
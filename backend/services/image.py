@@ -9,10 +9,10 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Dict, Any, Generator, List, Optional, Tuple
 from backend.generators.factory import ImageGeneratorFactory
 from backend.utils.image_compressor import compress_image
-from backend.utils.logger import get_detailed_logger
+from backend.utils.logger import IMAGE_LOGGER, ImageBatchLog
 
 logger = logging.getLogger(__name__)
-detailed_logger = get_detailed_logger(__name__)
+detailed_logger = IMAGE_LOGGER
 
 _TASK_STATES: Dict[str, Dict[str, Any]] = {}
 _TASK_STATES_LOCK = threading.RLock()
@@ -209,7 +209,8 @@ class ImageService:
         retry_count: int = 0,
         full_outline: str = "",
         user_images: Optional[List[bytes]] = None,
-        user_topic: str = ""
+        user_topic: str = "",
+        batch_log: Optional[ImageBatchLog] = None
     ) -> Tuple[int, bool, Optional[str], Optional[str]]:
         """
         生成单张图片（带自动重试）
@@ -222,6 +223,7 @@ class ImageService:
             full_outline: 完整的大纲文本
             user_images: 用户上传的参考图片列表
             user_topic: 用户原始输入
+            batch_log: 批量任务的日志累加器（可选，传入时调用和成功只计入汇总，不单独输出日志框）
 
         Returns:
             (index, success, filename, error_message)
@@ -255,7 +257,8 @@ class ImageService:
 
                 # 记录 API 调用详情（仅第一次尝试记录详细信息）
                 if attempt == 0:
-                    detailed_logger.log_image_api_call(
+                    log_api_call = batch_log.record_call if batch_log is not None else detailed_logger.log_image_api_call
+                    log_api_call(
                         index=index,
                         page_type=page_type,
                         provider=self.provider_name,
@@ -312,13 +315,18 @@ class ImageService:
                 elapsed = time.time() - image_start_time
 
                 # 记录成功
-                detailed_logger.log_image_success(
-                    index=index,
-                    filename=filename,
-                    file_size=file_size,
-                    compressed=True,  # 我们总是压缩图片
-                    elapsed_time=elapsed
-                )
+                if batch_log is not None:
+                    batch_log.record_result(
+                        index, True, elapsed_time=elapsed, file_size=file_size, filename=filename
+                    )
+                else:
+                    detailed_logger.log_image_success(
+                        index=index,
+                        filename=filename,
+                        file_size=file_size,
+                        compressed=True,  # 我们总是压缩图片
+                        elapsed_time=elapsed
+                    )
 
                 return (index, True, filename, None)
 
@@ -341,6 +349,8 @@ class ImageService:
                     time.sleep(wait_time)
                     continue
 
+                if batch_log is not None:
+                    batch_log.record_result(index, False)
                 return (index, False, None, error_msg)
 
         return (index, False, None, "超过最大重试次数")
@@ -374,7 +384,8 @@ class ImageService:
 
         # 记录任务开始
         use_reference = user_images is not None and len(user_images) > 0
-        detailed_logger.log_image_generation_start(task_id, len(pages), use_reference)
+        # 单张图片的调用和结果计入累加器，结束时汇总输出一个日志框
+        batch_log = detailed_logger.begin_image_batch(task_id, len(pages), use_reference)
 
         # 创建任务专属目录
         self.current_task_dir = os.path.join(self.history_root_dir, task_id)
@@ -437,7 +448,7 @@ class ImageService:
             # 生成封面（使用用户上传的图片作为参考）
             index, success, filename, error = self._generate_single_image(
                 cover_page, task_id, reference_image=None, full_outline=full_outline,
-                user_images=compressed_user_images, user_topic=user_topic
+                user_images=compressed_user_images, user_topic=user_topic, batch_log=batch_log
             )
 
             if success:
@@ -514,7 +525,8 @@ class ImageService:
                             0,  # retry_count
                             full_outline,  # 传入完整大纲
                             compressed_user_images,  # 用户上传的参考图片（已压缩）
-                            user_topic  # 用户原始输入
+                            user_topic,  # 用户原始输入
+                            batch_log
                         ): page
                         for page in other_pages
                     }
@@ -621,7 +633,8 @@ class ImageService:
                         0,
                         full_outline,
                         compressed_user_images,
-                        user_topic
+                        user_topic,
+                        batch_log
                     )
 
                     if success:
@@ -664,7 +677,8 @@ class ImageService:
             total=total,
             success=success_count,
             failed=len(failed_pages),
-            elapsed_time=elapsed_total
+            elapsed_time=elapsed_total,
+            batch=batch_log
         )
 
         yield {
@@ -2,14 +2,129 @@ import logging
 import os
 import re
 import json
+import threading
 import time
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, List, Any, Optional
 from backend.utils.text_client import get_text_chat_client
-from backend.utils.logger import get_detailed_logger
+from backend.utils.logger import OUTLINE_LOGGER
 
 logger = logging.getLogger(__name__)
-detailed_logger = get_detailed_logger(__name__)
+detailed_logger = OUTLINE_LOGGER
+
+
+# 大纲解析用的正则和页面类型映射（模块加载时编译一次）
+_PAGE_SPLIT_RE = re.compile(r'<page>', re.IGNORECASE)
+_PAGE_TYPE_RE = re.compile(r"\[(\S+)\]")
+PAGE_TYPE_MAPPING = {
+    "封面": "cover",
+    "内容": "content",
+    "总结": "summary",
+}
+
+# 错误分类：一次扫描错误信息找出所有关键词，再按下面的优先级取第一个命中的类别
+_OUTLINE_ERROR_RE = re.compile(
+    r'(?P<auth>api_key|unauthorized|401)'
+    r'|(?P<model>model|404)'
+    r'|(?P<network>timeout|连接)'
+    r'|(?P<quota>rate|429|quota)',
+    re.IGNORECASE
+)
+_OUTLINE_ERROR_PRIORITY = ('auth', 'model', 'network', 'quota')
+
+# 各类错误的 (错误类型, 详细说明模板)
+_OUTLINE_ERRORS = {
+    'auth': (
+        "API 认证失败",
+        "API 认证失败。\n"
+        "错误详情: {error_msg}\n"
+        "可能原因：\n"
+        "1. API Key 无效或已过期\n"
+        "2. API Key 没有访问该模型的权限\n"
+        "解决方案：在系统设置页面检查并更新 API Key"
+    ),
+    'model': (
+        "模型访问失败",
+        "模型访问失败。\n"
+        "错误详情: {error_msg}\n"
+        "可能原因：\n"
+        "1. 模型名称不正确\n"
+        "2. 没有访问该模型的权限\n"
+        "解决方案：在系统设置页面检查模型名称配置"
+    ),
+    'network': (
+        "网络连接失败",
+        "网络连接失败。\n"
+        "错误详情: {error_msg}\n"
+        "可能原因：\n"
+        "1. 网络连接不稳定\n"
+        "2. API 服务暂时不可用\n"
+        "3. Base URL 配置错误\n"
+        "解决方案：检查网络连接，稍后重试"
+    ),
+    'quota': (
+        "API 配额限制",
+        "API 配额限制。\n"
+        "错误详情: {error_msg}\n"
+        "可能原因：\n"
+        "1. API 调用次数超限\n"
+        "2. 账户配额用尽\n"
+        "解决方案：等待配额重置，或升级 API 套餐"
+    ),
+    'unknown': (
+        "未知错误",
+        "大纲生成失败。\n"
+        "错误详情: {error_msg}\n"
+        "可能原因：\n"
+        "1. Text API 配置错误或密钥无效\n"
+        "2. 网络连接问题\n"
+        "3. 模型无法访问或不存在\n"
+        "建议：在系统设置页面检查文本服务商配置"
+    ),
+}
+
+
+def _classify_outline_error(error_msg: str) -> tuple:
+    """
+    根据错误信息判断大纲生成失败的类型
+
+    Args:
+        error_msg: 异常信息
+
+    Returns:
+        (错误类型, 给用户看的详细说明)
+    """
+    found = {m.lastgroup for m in _OUTLINE_ERROR_RE.finditer(error_msg)}
+    key = next((k for k in _OUTLINE_ERROR_PRIORITY if k in found), 'unknown')
+    error_type, template = _OUTLINE_ERRORS[key]
+    return error_type, template.format(error_msg=error_msg)
+
+
+# 文本服务商配置缓存：{user_id: (过期时间, 配置)}
+# 保存服务商配置时由 config_routes 调用 clear_text_config_cache 清空，TTL 兜底其他途径的修改
+TEXT_CONFIG_CACHE_TTL = 60  # 秒
+TEXT_CONFIG_CACHE_SIZE = 1024
+_text_config_cache: Dict[Optional[int], tuple] = {}
+_text_config_cache_lock = threading.Lock()
+
+
+def clear_text_config_cache():
+    """清空文本服务商配置缓存（服务商配置变更后调用）"""
+    with _text_config_cache_lock:
+        _text_config_cache.clear()
+
+
+@lru_cache(maxsize=1)
+def _load_prompt_template() -> str:
+    """读取大纲提示词模板（文件内容固定，进程内只读取一次）"""
+    prompt_path = os.path.join(
+        os.path.dirname(os.path.dirname(__file__)),
+        "prompts",
+        "outline_prompt.txt"
+    )
+    with open(prompt_path, "r", encoding="utf-8") as f:
+        return f.read()
 
 
 class OutlineService:
@@ -18,13 +133,18 @@ class OutlineService:
         self.user_id = user_id
         self.text_config = self._load_text_config()
         self.client = self._get_client()
-        self.prompt_template = self._load_prompt_template()
+        self.prompt_template = _load_prompt_template()
         logger.info(f"OutlineService 初始化完成，使用服务商: {self.text_config.get('active_provider')}")
 
     def _load_text_config(self) -> dict:
-        """从数据库加载文本生成配置"""
+        """从数据库加载文本生成配置（按用户缓存 TEXT_CONFIG_CACHE_TTL 秒）"""
         from backend.models import ProviderConfig
 
+        cached = _text_config_cache.get(self.user_id)
+        if cached is not None and cached[0] > time.time():
+            logger.debug(f"使用缓存的文本配置 (user_id={self.user_id})")
+            return cached[1]
+
         logger.debug(f"从数据库加载文本配置 (user_id={self.user_id})...")
 
         # 查询用户的文本服务商配置
@@ -74,10 +194,16 @@ class OutlineService:
 
         logger.debug(f"文本配置加载成功: active={active_provider}, providers={list(providers.keys())}")
 
-        return {
+        text_config = {
             'active_provider': active_provider,
             'providers': providers
         }
+        with _text_config_cache_lock:
+            if self.user_id not in _text_config_cache and len(_text_config_cache) >= TEXT_CONFIG_CACHE_SIZE:
+                # 淘汰最早写入的条目
+                _text_config_cache.pop(next(iter(_text_config_cache)), None)
+            _text_config_cache[self.user_id] = (time.time() + TEXT_CONFIG_CACHE_TTL, text_config)
+        return text_config
 
     def _get_client(self):
         """根据配置获取客户端"""
@@ -112,50 +238,32 @@ class OutlineService:
         logger.info(f"使用文本服务商: {active_provider} (type={provider_config.get('type')})")
         return get_text_chat_client(provider_config)
 
-    def _load_prompt_template(self) -> str:
-        prompt_path = os.path.join(
-            os.path.dirname(os.path.dirname(__file__)),
-            "prompts",
-            "outline_prompt.txt"
-        )
-        with open(prompt_path, "r", encoding="utf-8") as f:
-            return f.read()
-
     def _parse_outline(self, outline_text: str) -> List[Dict[str, Any]]:
         # 按 <page> 分割页面（兼容旧的 --- 分隔符）
         if '<page>' in outline_text:
-            pages_raw = re.split(r'<page>', outline_text, flags=re.IGNORECASE)
+            pages_raw = _PAGE_SPLIT_RE.split(outline_text)
         else:
             # 向后兼容：如果没有 <page> 则使用 ---
             pages_raw = outline_text.split("---")
 
-        pages = []
-
-        page_index = 0
-        for page_text in pages_raw:
-            page_text = page_text.strip()
-            if not page_text:
-                continue
-
-            page_type = "content"
-            type_match = re.match(r"\[(\S+)\]", page_text)
-            if type_match:
-                type_cn = type_match.group(1)
-                type_mapping = {
-                    "封面": "cover",
-                    "内容": "content",
-                    "总结": "summary",
-                }
-                page_type = type_mapping.get(type_cn, "content")
-
-            pages.append({
+        # 先去掉空白页，index 直接取过滤后的位置，构造时一次生成
+        page_texts = [text for text in (raw.strip() for raw in pages_raw) if text]
+        return [
+            {
                 "index": page_index,
-                "type": page_type,
+                "type": self._page_type(page_text),
                 "content": page_text
-            })
-            page_index += 1
+            }
+            for page_index, page_text in enumerate(page_texts)
+        ]
 
-        return pages
+    @staticmethod
+    def _page_type(page_text: str) -> str:
+        """根据页面开头的 [类型] 标记识别页面类型，未标记或未知类型按 content 处理"""
+        type_match = _PAGE_TYPE_RE.match(page_text)
+        if type_match:
+            return PAGE_TYPE_MAPPING.get(type_match.group(1), "content")
+        return "content"
 
     def generate_outline(
         self,
@@ -225,58 +333,7 @@ class OutlineService:
             error_msg = str(e)
 
             # 确定错误类型
-            error_type = "未知错误"
-            if "api_key" in error_msg.lower() or "unauthorized" in error_msg.lower() or "401" in error_msg:
-                error_type = "API 认证失败"
-                detailed_error = (
-                    f"API 认证失败。\n"
-                    f"错误详情: {error_msg}\n"
-                    "可能原因：\n"
-                    "1. API Key 无效或已过期\n"
-                    "2. API Key 没有访问该模型的权限\n"
-                    "解决方案：在系统设置页面检查并更新 API Key"
-                )
-            elif "model" in error_msg.lower() or "404" in error_msg:
-                error_type = "模型访问失败"
-                detailed_error = (
-                    f"模型访问失败。\n"
-                    f"错误详情: {error_msg}\n"
-                    "可能原因：\n"
-                    "1. 模型名称不正确\n"
-                    "2. 没有访问该模型的权限\n"
-                    "解决方案：在系统设置页面检查模型名称配置"
-                )
-            elif "timeout" in error_msg.lower() or "连接" in error_msg:
-                error_type = "网络连接失败"
-                detailed_error = (
-                    f"网络连接失败。\n"
-                    f"错误详情: {error_msg}\n"
-                    "可能原因：\n"
-                    "1. 网络连接不稳定\n"
-                    "2. API 服务暂时不可用\n"
-                    "3. Base URL 配置错误\n"
-                    "解决方案：检查网络连接，稍后重试"
-                )
-            elif "rate" in error_msg.lower() or "429" in error_msg or "quota" in error_msg.lower():
-                error_type = "API 配额限制"
-                detailed_error = (
-                    f"API 配额限制。\n"
-                    f"错误详情: {error_msg}\n"
-                    "可能原因：\n"
-                    "1. API 调用次数超限\n"
-                    "2. 账户配额用尽\n"
-                    "解决方案：等待配额重置，或升级 API 套餐"
-                )
-            else:
-                detailed_error = (
-                    f"大纲生成失败。\n"
-                    f"错误详情: {error_msg}\n"
-                    "可能原因：\n"
-                    "1. Text API 配置错误或密钥无效\n"
-                    "2. 网络连接问题\n"
-                    "3. 模型无法访问或不存在\n"
-                    "建议：在系统设置页面检查文本服务商配置"
-                )
+            error_type, detailed_error = _classify_outline_error(error_msg)
 
             # 记录详细错误
             detailed_logger.log_outline_error(error_msg, error_type)
@@ -4,13 +4,27 @@
 包含 JWT Token 生成/验证和密码加密/验证功能
 """
 import os
+import base64
+import hashlib
+import hmac
 import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from functools import wraps
+from functools import lru_cache, wraps
 
 import jwt
 import bcrypt
-from flask import request, jsonify, g
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
+from flask import request, g
+from sqlalchemy import event, inspect as sa_inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from backend.models import db, User
+from backend.utils import json_utils
+from backend.utils.json_utils import static_json_response
 
 logger = logging.getLogger(__name__)
 
@@ -18,11 +32,55 @@ logger = logging.getLogger(__name__)
 JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'redink-secret-key-change-in-production')
 JWT_ALGORITHM = 'HS256'
 JWT_EXPIRATION_HOURS = 24 * 7  # Token 有效期 7 天
+_JWT_SECRET_BYTES = JWT_SECRET_KEY.encode('utf-8')
+
+# 认证失败的固定错误响应（模块加载时序列化一次）
+ERR_TOKEN_MISSING = static_json_response(
+    {'success': False, 'error': '未提供认证令牌', 'code': 'TOKEN_MISSING'}, 401
+)
+ERR_USER_NOT_FOUND = static_json_response(
+    {'success': False, 'error': '用户不存在', 'code': 'USER_NOT_FOUND'}, 401
+)
+ERR_USER_DISABLED = static_json_response(
+    {'success': False, 'error': '用户已被禁用', 'code': 'USER_DISABLED'}, 401
+)
+ERR_TOKEN_EXPIRED = static_json_response(
+    {'success': False, 'error': '认证令牌已过期', 'code': 'TOKEN_EXPIRED'}, 401
+)
+ERR_TOKEN_INVALID = static_json_response(
+    {'success': False, 'error': '无效的认证令牌', 'code': 'TOKEN_INVALID'}, 401
+)
+
+# 已验证 Token 的载荷缓存：同一 Token 的重复请求在短时间内跳过 HMAC 校验和解码
+# 缓存的只是签名校验结果，用户状态（is_active 等）仍在每次请求时重新检查
+TOKEN_CACHE_TTL = 30  # 秒
+TOKEN_CACHE_SIZE = 10000
+_token_cache: dict[str, tuple[dict, float]] = {}
+_token_cache_lock = threading.Lock()
+
+# 用户信息缓存：{user_id: (过期时间, 列值)}，认证装饰器命中时不再查询 users 表
+# 通过 ORM 修改或删除用户（含 query.update/delete 批量操作）时由下方的事件监听自动失效；
+# TTL 只兜底绕过应用直接修改数据库的情况
+USER_CACHE_TTL = 30  # 秒
+USER_CACHE_SIZE = 10000
+_user_cache: dict[int, tuple[float, dict]] = {}
+_user_cache_lock = threading.Lock()
+
+# 新密码使用 Argon2id（OWASP 推荐参数：19 MiB 内存、2 次迭代），耗时远低于默认 cost 的 bcrypt；
+# 旧的 bcrypt 哈希仍可验证，并在登录成功时升级
+_argon2_hasher = PasswordHasher(time_cost=2, memory_cost=19456, parallelism=1)
+ARGON2_HASH_PREFIX = '$argon2'
+
+# 密码哈希线程池（argon2 / bcrypt 计算时会释放 GIL，可与数据库查询并行）
+_password_executor = ThreadPoolExecutor(
+    max_workers=os.cpu_count() or 1,
+    thread_name_prefix='password-hash'
+)
 
 
 def hash_password(password: str) -> str:
     """
-    使用 bcrypt 加密密码
+    使用 Argon2id 加密密码
 
     Args:
         password: 明文密码
@@ -30,13 +88,43 @@ def hash_password(password: str) -> str:
     Returns:
         加密后的密码哈希
     """
-    salt = bcrypt.gensalt()
-    return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+    return _argon2_hasher.hash(password)
+
+
+def hash_password_async(password: str) -> Future:
+    """
+    在线程池中加密密码，调用方可在等待结果的同时执行其他 I/O
+
+    Args:
+        password: 明文密码
+
+    Returns:
+        Future，result() 为加密后的密码哈希
+    """
+    return _password_executor.submit(hash_password, password)
+
+
+@lru_cache(maxsize=1)
+def _dummy_password_hash() -> str:
+    """用于用户不存在时的占位哈希（首次使用时生成）"""
+    return hash_password('redink-dummy-password')
+
+
+def verify_dummy_password(password: str) -> None:
+    """
+    对占位哈希执行一次密码校验
+
+    用户不存在时调用，使登录耗时与“用户存在但密码错误”一致，避免通过响应时间枚举用户名
+
+    Args:
+        password: 明文密码
+    """
+    verify_password(password, _dummy_password_hash())
 
 
 def verify_password(password: str, password_hash: str) -> bool:
     """
-    验证密码是否正确
+    验证密码是否正确（Argon2 哈希按前缀识别，其余按旧的 bcrypt 哈希校验）
 
     Args:
         password: 明文密码
@@ -45,6 +133,15 @@ def verify_password(password: str, password_hash: str) -> bool:
     Returns:
         密码是否匹配
     """
+    if password_hash.startswith(ARGON2_HASH_PREFIX):
+        try:
+            return _argon2_hasher.verify(password_hash, password)
+        except VerificationError:
+            return False
+        except InvalidHashError as e:
+            logger.error(f"密码验证失败: {e}")
+            return False
+
     try:
         return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
     except Exception as e:
@@ -52,6 +149,21 @@ def verify_password(password: str, password_hash: str) -> bool:
         return False
 
 
+def password_needs_rehash(password_hash: str) -> bool:
+    """
+    判断密码哈希是否需要升级（旧的 bcrypt 哈希，或 Argon2 参数已调整）
+
+    Args:
+        password_hash: 数据库中的密码哈希
+
+    Returns:
+        是否应在登录成功后用当前算法重新加密
+    """
+    if not password_hash.startswith(ARGON2_HASH_PREFIX):
+        return True
+    return _argon2_hasher.check_needs_rehash(password_hash)
+
+
 def generate_token(user_id: int, username: str) -> str:
     """
     生成 JWT Token
@@ -72,9 +184,55 @@ def generate_token(user_id: int, username: str) -> str:
     return jwt.encode(payload, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
 
 
+def _b64url_decode(segment: str) -> bytes:
+    """解码去掉了填充的 base64url 片段"""
+    return base64.urlsafe_b64decode(segment + '=' * (-len(segment) % 4))
+
+
+def _fast_decode(token: str) -> dict | None:
+    """
+    HS256 Token 的快速校验：直接用 hmac 校验签名、orjson 解析载荷，省去 PyJWT 的通用处理
+
+    只接受本服务签发的常规 Token（HS256、未过期、无 nbf/aud 等额外声明）；
+    其他情况（包括所有校验失败）返回 None，交给 jwt.decode 处理，以保证抛出的异常类型不变
+
+    Args:
+        token: JWT Token 字符串
+
+    Returns:
+        Token 载荷，无法走快速路径时返回 None
+    """
+    try:
+        signing_input, _, signature = token.rpartition('.')
+        header_segment, _, payload_segment = signing_input.partition('.')
+        header = json_utils.loads(_b64url_decode(header_segment))
+        if header.get('alg') != JWT_ALGORITHM or 'crit' in header:
+            return None
+
+        expected = hmac.new(_JWT_SECRET_BYTES, signing_input.encode('ascii'), hashlib.sha256).digest()
+        if not hmac.compare_digest(expected, _b64url_decode(signature)):
+            return None
+
+        payload = json_utils.loads(_b64url_decode(payload_segment))
+    except Exception:
+        return None
+
+    if not isinstance(payload, dict) or 'nbf' in payload or 'aud' in payload:
+        return None
+
+    now = time.time()
+    exp = payload.get('exp')
+    iat = payload.get('iat')
+    if not isinstance(exp, int) or exp <= now:
+        return None
+    if iat is not None and (not isinstance(iat, int) or iat > now):
+        return None
+    return payload
+
+
 def decode_token(token: str) -> dict:
     """
-    解码 JWT Token
+    解码 JWT Token（验证通过的结果会短时间缓存，缓存时长不超过 Token 的过期时间）
 
     Args:
         token: JWT Token 字符串
@@ -86,7 +244,23 @@ def decode_token(token: str) -> dict:
         jwt.ExpiredSignatureError: Token 已过期
         jwt.InvalidTokenError: Token 无效
     """
-    return jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
+    now = time.time()
+    cached = _token_cache.get(token)
+    if cached is not None and cached[1] > now:
+        return cached[0]
+
+    payload = _fast_decode(token)
+    if payload is None:
+        payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
+
+    # 缓存到期时间取 TTL 与 Token 过期时间中较早的一个，过期的 Token 总会重新走 jwt.decode 报错
+    expires_at = min(now + TOKEN_CACHE_TTL, payload.get('exp', float('inf')))
+    with _token_cache_lock:
+        if cached is None and len(_token_cache) >= TOKEN_CACHE_SIZE:
+            # 淘汰最早写入的条目
+            _token_cache.pop(next(iter(_token_cache)), None)
+        _token_cache[token] = (payload, expires_at)
+    return payload
 
 
 def get_token_from_request() -> str | None:
@@ -104,7 +278,7 @@ def get_token_from_request() -> str | None:
 
 def get_current_user():
     """
-    获取当前请求的用户
+    获取当前请求的用户（由认证装饰器在每个请求中加载一次并缓存在 g 上）
 
     Returns:
         User 对象，如果未登录则返回 None
@@ -123,6 +297,121 @@ def get_current_user_id() -> int | None:
     return user.id if user else None
 
 
+def clear_current_user(exc=None) -> None:
+    """
+    请求结束时清除 g 上的用户（注册为 teardown_request）
+
+    g 属于应用上下文：多个请求共用同一个已推入的应用上下文时，
+    不清除的话下一个请求会直接复用上一个请求认证过的用户
+    """
+    g.pop('current_user', None)
+
+
+def invalidate_cached_user(user_id: int) -> None:
+    """
+    移除缓存的用户信息（用户信息变更后调用）
+
+    Args:
+        user_id: 用户 ID
+    """
+    with _user_cache_lock:
+        _user_cache.pop(user_id, None)
+
+
+def _clear_user_cache() -> None:
+    """清空全部缓存的用户信息"""
+    with _user_cache_lock:
+        _user_cache.clear()
+
+
+# 会话中已变更、需在提交后再次失效的用户：session.info 中的键
+_PENDING_USER_INVALIDATIONS = 'redink_invalidated_users'
+# 批量 UPDATE/DELETE 无法得知具体用户，用该标记表示提交后清空全部缓存
+_ALL_USERS = object()
+
+
+def _mark_user_changed(session, user_id) -> None:
+    """立即失效缓存，并记录下来在提交后再失效一次（避免并发请求在提交前读回旧数据并重新缓存）"""
+    if user_id is _ALL_USERS:
+        _clear_user_cache()
+    else:
+        invalidate_cached_user(user_id)
+    session.info.setdefault(_PENDING_USER_INVALIDATIONS, set()).add(user_id)
+
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _on_user_changed(mapper, connection, target):
+    """通过 ORM 修改（禁用、改密码等）或删除用户时失效其缓存"""
+    session = Session.object_session(target)
+    if session is not None:
+        _mark_user_changed(session, target.id)
+    else:
+        invalidate_cached_user(target.id)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _on_bulk_user_change(orm_execute_state):
+    """query.update() / query.delete() 等批量修改 users 表时清空用户缓存"""
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.class_ is User:
+        _mark_user_changed(orm_execute_state.session, _ALL_USERS)
+
+
+@event.listens_for(Session, 'after_commit')
+def _on_commit_invalidate_users(session):
+    """提交后再次失效本事务中变更过的用户"""
+    pending = session.info.pop(_PENDING_USER_INVALIDATIONS, None)
+    if not pending:
+        return
+    if _ALL_USERS in pending:
+        _clear_user_cache()
+        return
+    for user_id in pending:
+        invalidate_cached_user(user_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _on_rollback_discard_users(session):
+    """回滚后丢弃待失效记录（缓存已在变更时失效，之后会按数据库中的值重新加载）"""
+    session.info.pop(_PENDING_USER_INVALIDATIONS, None)
+
+
+def _load_user(user_id):
+    """
+    获取认证用户，优先使用缓存的列值
+
+    命中缓存时用列值构造实例并以 merge(load=False) 挂到当前会话，不发出 SELECT；
+    返回的始终是当前会话中的对象，与直接查询得到的用法一致
+
+    Args:
+        user_id: 用户 ID
+
+    Returns:
+        User 对象，不存在时返回 None
+    """
+    now = time.time()
+    cached = _user_cache.get(user_id)
+    if cached is not None and cached[0] > now:
+        user = User(**cached[1])
+        make_transient_to_detached(user)
+        return db.session.merge(user, load=False)
+
+    user = db.session.get(User, user_id)
+    if user is None:
+        return None
+
+    values = {attr.key: getattr(user, attr.key) for attr in sa_inspect(User).column_attrs}
+    with _user_cache_lock:
+        if user_id not in _user_cache and len(_user_cache) >= USER_CACHE_SIZE:
+            # 淘汰最早写入的条目
+            _user_cache.pop(next(iter(_user_cache)), None)
+        _user_cache[user_id] = (now + USER_CACHE_TTL, values)
+    return user
+
+
 def jwt_required(f):
     """
     JWT 认证装饰器
@@ -131,53 +420,36 @@ def jwt_required(f):
     """
     @wraps(f)
     def decorated_function(*args, **kwargs):
+        # 本次请求已完成认证（如装饰器叠加），直接复用 g 上的用户，不再重复解码和查询
+        if get_current_user() is not None:
+            return f(*args, **kwargs)
+
         token = get_token_from_request()
 
         if not token:
-            return jsonify({
-                'success': False,
-                'error': '未提供认证令牌',
-                'code': 'TOKEN_MISSING'
-            }), 401
+            return ERR_TOKEN_MISSING()
 
         try:
             payload = decode_token(token)
             user_id = payload.get('user_id')
 
-            # 从数据库获取用户
-            from backend.models import User
-            user = User.query.get(user_id)
+            # 获取用户（短时间内重复请求走缓存）
+            user = _load_user(user_id)
 
             if not user:
-                return jsonify({
-                    'success': False,
-                    'error': '用户不存在',
-                    'code': 'USER_NOT_FOUND'
-                }), 401
+                return ERR_USER_NOT_FOUND()
 
             if not user.is_active:
-                return jsonify({
-                    'success': False,
-                    'error': '用户已被禁用',
-                    'code': 'USER_DISABLED'
-                }), 401
+                return ERR_USER_DISABLED()
 
             # 将用户信息存储到 Flask g 对象
             g.current_user = user
 
         except jwt.ExpiredSignatureError:
-            return jsonify({
-                'success': False,
-                'error': '认证令牌已过期',
-                'code': 'TOKEN_EXPIRED'
-            }), 401
+            return ERR_TOKEN_EXPIRED()
         except jwt.InvalidTokenError as e:
             logger.warning(f"无效的 Token: {e}")
-            return jsonify({
-                'success': False,
-                'error': '无效的认证令牌',
-                'code': 'TOKEN_INVALID'
-            }), 401
+            return ERR_TOKEN_INVALID()
 
         return f(*args, **kwargs)
 
@@ -195,13 +467,12 @@ def jwt_optional(f):
     def decorated_function(*args, **kwargs):
         token = get_token_from_request()
 
-        if token:
+        if token and get_current_user() is None:
             try:
                 payload = decode_token(token)
                 user_id = payload.get('user_id')
 
-                from backend.models import User
-                user = User.query.get(user_id)
+                user = _load_user(user_id)
 
                 if user and user.is_active:
                     g.current_user = user
@@ -0,0 +1,135 @@
+"""
+JSON 编解码工具
+
+优先使用 orjson（C 实现，解析和序列化明显快于标准库），
+未安装时回退到标准库 json，调用方无需关心具体实现
+"""
+import decimal
+import json
+from datetime import date
+
+from flask import Response
+from flask.json.provider import DefaultJSONProvider, JSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 依赖缺失时回退
+    orjson = None
+
+# 允许 int 等非字符串键（与标准库 json 自动转成字符串的行为一致）
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS if orjson is not None else 0
+
+
+def loads(data):
+    """
+    解析 JSON
+
+    Args:
+        data: JSON 字符串或 bytes
+
+    Returns:
+        解析后的 Python 对象
+
+    Raises:
+        json.JSONDecodeError: JSON 格式错误（orjson 的异常也是其子类）
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def load_file(path) -> object:
+    """
+    读取并解析 JSON 文件
+
+    Args:
+        path: 文件路径
+
+    Returns:
+        解析后的 Python 对象
+    """
+    with open(path, 'rb') as f:
+        return loads(f.read())
+
+
+def dumps(obj) -> str:
+    """
+    序列化为 JSON 字符串（用于写入 TEXT 列等需要 str 的场景）
+
+    Args:
+        obj: 待序列化对象
+
+    Returns:
+        JSON 字符串
+    """
+    if orjson is not None:
+        return orjson.dumps(obj).decode('utf-8')
+    return json.dumps(obj, ensure_ascii=False)
+
+
+def _default(obj):
+    """orjson 不支持的类型回退处理（与 Flask 默认 provider 保持一致）"""
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class OrjsonProvider(JSONProvider):
+    """
+    基于 orjson 的 Flask JSON Provider
+
+    jsonify() 直接把 orjson 输出的 bytes 作为响应体，省去 str 编解码；
+    request.get_json() 也走 orjson 解析。仅在 orjson 可用时注册
+    """
+
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS),
+            mimetype='application/json'
+        )
+
+
+class IsoDateJSONProvider(DefaultJSONProvider):
+    """
+    orjson 不可用时的回退 Provider
+
+    datetime 按 ISO 8601 输出（与 orjson 及 isoformat() 一致），而不是 Flask 默认的 HTTP 日期格式，
+    模型可以直接返回 datetime 对象
+    """
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, date):
+            return o.isoformat()
+        return DefaultJSONProvider.default(o)
+
+
+def static_json_response(payload, status: int = 200):
+    """
+    为内容固定的 JSON 响应（如校验失败的错误信息）预先序列化一次
+
+    返回的工厂每次调用都生成新的 Response（响应体 bytes 共享），
+    避免 after_request 钩子（如 CORS 头）修改到跨请求共享的 Response 对象
+
+    Args:
+        payload: 响应内容
+        status: HTTP 状态码
+
+    Returns:
+        无参工厂函数，调用后返回 Response
+    """
+    body = dumps(payload).encode('utf-8')
+
+    def make_response() -> Response:
+        return Response(body, status=status, mimetype='application/json')
+
+    return make_response
@@ -1,163 +1,506 @@
 """醒目的日志工具类"""
 import logging
+import sys
+import threading
+import time
+from datetime import datetime
+from functools import lru_cache
 from typing import Optional
 
-# ANSI 颜色代码
+from backend.utils import json_utils
+
+# 控制码（模块级常量，拼接日志框时直接引用）
+_RESET = '\033[0m'
+_BOLD = '\033[1m'
+# 日志框结尾：最后一行边框之后恢复默认颜色
+_BOX_TAIL = _RESET + '\n'
+
+
+# ANSI 颜色代码（日志框用到的颜色）
 class Colors:
-    RESET = '\033[0m'
-    BOLD = '\033[1m'
+    RESET = _RESET
+    BOLD = _BOLD
     RED = '\033[91m'
     GREEN = '\033[92m'
     YELLOW = '\033[93m'
     BLUE = '\033[94m'
-    MAGENTA = '\033[95m'
     CYAN = '\033[96m'
-    WHITE = '\033[97m'
+
+
+def _box_style(color: str) -> tuple:
+    """生成某个颜色日志框用到的 ANSI 片段：(标题行前缀, 行间分隔)"""
+    return f"\n{color}{_BOLD}", f"{_RESET}\n{color}"
+
+
+# 各颜色的日志框片段在模块加载时拼好
+_BOX_STYLES = {
+    color: _box_style(color)
+    for color in (Colors.CYAN, Colors.BLUE, Colors.GREEN, Colors.YELLOW, Colors.RED)
+}
+
+
+def _truncate(text: str, limit: int) -> str:
+    """超过 limit 个字符时截断并追加省略号（只计算一次长度，未超长时直接返回原字符串）"""
+    if len(text) <= limit:
+        return text
+    return text[:limit] + "..."
+
+
+def _percent_str(part: int, total: int) -> str:
+    """
+    用整数运算把 part / total 格式化为保留一位小数的百分比（四舍六入五成双）
+
+    0% 和 100% 这两种最常见的结果直接返回，其余情况精确到千分位后再取舍，不经过浮点数
+    """
+    if total <= 0 or part <= 0:
+        return "0.0"
+    if part >= total:
+        return "100.0"
+    tenths, remainder = divmod(part * 1000, total)
+    if remainder * 2 > total or (remainder * 2 == total and tenths & 1):
+        tenths += 1
+    return f"{tenths // 10}.{tenths % 10}"
+
+
+# 日志框内容模板（%-格式，模块加载时定义一次）：输出日志框时一次格式化生成全部内容，再按行拆开交给 _format_box；
+# 输出 JSON 时不使用模板，直接输出同一组字段
+_OUTLINE_START_TMPL = (
+    "📝 主题: %(topic)s\n"
+    "🖼️  参考图片: %(images)s\n"
+    "⏰ 开始时间: %(timestamp)s"
+)
+_IMAGE_START_TMPL = (
+    "🎯 任务ID: %(task_id)s\n"
+    "📊 总页数: %(total_pages)s\n"
+    "🖼️  使用参考图: %(use_reference)s\n"
+    "⏰ 开始时间: %(timestamp)s"
+)
+_OUTLINE_API_CALL_TMPL = (
+    "🔌 服务商: %(provider)s\n"
+    "🤖 模型: %(model)s\n"
+    "🌡️  温度: %(temperature)s\n"
+    "📏 最大Token: %(max_tokens)s\n"
+    "📝 提示词长度: %(prompt_length)s 字符"
+)
+_OUTLINE_SUCCESS_TMPL = (
+    "✅ 状态: 成功\n"
+    "📄 生成字数: %(outline_length)s 字符\n"
+    "📑 页面数量: %(page_count)s 页\n"
+    "⏱️  耗时: %(elapsed_time).2f 秒"
+)
+_OUTLINE_ERROR_TMPL = (
+    "❌ 错误类型: %(error_type)s\n"
+    "💬 错误信息: %(error)s"
+)
+_IMAGE_API_CALL_TMPL = (
+    "📄 页面: P%(page)s (%(page_type)s)%(retry_info)s\n"
+    "🔌 服务商: %(provider)s\n"
+    "🤖 模型: %(model)s\n"
+    "📝 提示词长度: %(prompt_length)s 字符\n"
+    "🖼️  使用参考图: %(has_reference)s"
+)
+_IMAGE_SUCCESS_TMPL = (
+    "✅ 状态: 成功\n"
+    "📄 页面: P%(page)s\n"
+    "📁 文件名: %(filename)s\n"
+    "💾 文件大小: %(size_mb).2f MB\n"
+    "🗜️  已压缩: %(compressed)s\n"
+    "⏱️  耗时: %(elapsed_time).2f 秒"
+)
+_IMAGE_ERROR_TMPL = (
+    "❌ 状态: %(status)s\n"
+    "📄 页面: P%(page)s\n"
+    "💬 错误信息: %(error)s"
+)
+_BATCH_COMPLETE_TMPL = (
+    "📊 总计: %(total)s 张\n"
+    "✅ 成功: %(success)s 张\n"
+    "❌ 失败: %(failed)s 张\n"
+    "📈 成功率: %(success_rate)s%%\n"
+    "⏱️  总耗时: %(elapsed_time).2f 秒"
+)
+# 批量汇总的附加行：有对应数据时才拼接到 _BATCH_COMPLETE_TMPL 之后
+_BATCH_PROVIDER_TMPL = "🔌 服务商: %(provider)s (%(model)s)"
+_BATCH_TIMING_TMPL = (
+    "⏱️  单张耗时: 平均 %(avg_elapsed_time).2f 秒, P95 %(p95_elapsed_time).2f 秒\n"
+    "💾 图片总大小: %(total_mb).2f MB"
+)
+_BATCH_FAILED_TMPL = "📄 失败页面: %(failed_pages)s"
+
+# 时间戳的 "年-月-日 时:分" 前缀按线程缓存，同一分钟内只需格式化秒数
+_timestamp_cache = threading.local()
+
+# 边框字符串按宽度缓存（日志框的宽度种类很少）
+_BORDER_CACHE: dict[int, str] = {}
+
+
+class _Box:
+    """
+    延迟生成的边框文本块，作为日志参数传入（logger.info("%s", box)）
+
+    只有处理器真正格式化这条记录时才会调用 __str__ 拼接文本，被处理器过滤掉的记录不会产生拼接开销；
+    内容在创建后不再修改，整条记录可以原样交给日志监听线程格式化（见 is_deferred_record）。
+    json_output 为 None 时在输出时检查标准输出：不是终端（如 Docker 日志采集）时输出单行 JSON
+    {"event": 事件名, 字段...}，颜色代码和边框只会被下游丢弃
+
+    Attributes:
+        event: 事件名（JSON 输出的 event 字段）
+        title: 日志框标题
+        color: 日志框颜色
+        template: 日志框内容模板
+        fields: 事件字段（原始值，JSON 直接输出；日志框中布尔值显示为 是/否）
+        display: 只用于日志框的展示字段，覆盖 fields 中的同名字段
+    """
+    __slots__ = ('event', 'title', 'color', 'template', 'fields', 'display', 'json_output')
+
+    def __init__(self, event: str, title: str, color: str, template: str, fields: dict,
+                 display: Optional[dict] = None, json_output: Optional[bool] = None):
+        self.event = event
+        self.title = title
+        self.color = color
+        self.template = template
+        self.fields = fields
+        self.display = display
+        self.json_output = json_output
+
+    def __str__(self) -> str:
+        json_output = self.json_output
+        if json_output is None:
+            json_output = not _stdout_is_tty()
+        if json_output:
+            return json_utils.dumps({"event": self.event, **self.fields})
+
+        values = {
+            key: ('是' if value else '否') if value.__class__ is bool else value
+            for key, value in self.fields.items()
+        }
+        if self.display:
+            values.update(self.display)
+        content = (self.template % values).split('\n')
+        return DetailedLogger._format_box(self.title, content, self.color)
+
+
+def is_deferred_record(record: logging.LogRecord) -> bool:
+    """
+    日志记录能否原样入队、推迟到监听线程再格式化
+
+    参数全部是日志框、且不带异常信息时成立：日志框内容已固定，由哪个线程调用 __str__ 结果都一样
+    """
+    args = record.args
+    return (
+        isinstance(args, tuple) and bool(args) and not record.exc_info
+        and all(isinstance(arg, _Box) for arg in args)
+    )
+
+
+def _stdout_is_tty() -> bool:
+    """标准输出是否为终端（stdout 被关闭或替换成没有 isatty 的对象时按非终端处理）"""
+    isatty = getattr(sys.stdout, 'isatty', None)
+    try:
+        return bool(isatty and isatty())
+    except ValueError:
+        return False
+
+
+class ImageBatchLog:
+    """
+    一次批量生图任务的日志累加器
+
+    每张图片的调用和结果只追加到列表（list.append 在多线程下是原子的），
+    批量结束时由 DetailedLogger.log_batch_complete 汇总成一个日志框；
+    detailed=True 时仍为每张图片输出单独的日志框
+    """
+
+    def __init__(self, detailed_logger: 'DetailedLogger', detailed: bool = False):
+        self._detailed_logger = detailed_logger
+        self.detailed = detailed
+        self.provider = None
+        self.model = None
+        self.results = []  # [(index, 是否成功, 耗时秒数, 文件大小)]
+
+    def record_call(self, index: int, page_type: str, provider: str,
+                    model: str, prompt_length: int, has_reference: bool,
+                    attempt: int = 1, max_attempts: int = 1):
+        """记录单张图片 API 调用"""
+        self.provider = provider
+        self.model = model
+        if self.detailed:
+            self._detailed_logger.log_image_api_call(
+                index, page_type, provider, model, prompt_length, has_reference, attempt, max_attempts
+            )
+
+    def record_result(self, index: int, success: bool, elapsed_time: float = 0.0,
+                      file_size: int = 0, filename: Optional[str] = None, compressed: bool = True):
+        """记录单张图片的最终结果"""
+        self.results.append((index, success, elapsed_time, file_size))
+        if self.detailed and success:
+            self._detailed_logger.log_image_success(index, filename, file_size, compressed, elapsed_time)
 
 
 class DetailedLogger:
-    """提供醒目格式的日志工具"""
+    """
+    提供醒目格式的日志工具
 
-    def __init__(self, logger: logging.Logger):
+    每个 log_* 方法先检查对应级别是否启用，未启用时直接返回，不拼接日志内容；
+    边框文本块以 %s 参数的形式延迟到处理器格式化记录时才生成；
+    json_output 为 None 时每次输出时判断标准输出是否为终端，不是终端时改为输出由事件名和字段组成的单行 JSON
+    """
+
+    def __init__(self, logger: logging.Logger, json_output: Optional[bool] = None):
         self.logger = logger
+        self.json_output = json_output
+
+    def _box(self, event: str, title: str, color: str, template: str, fields: dict,
+             display: Optional[dict] = None) -> _Box:
+        """创建本记录器的日志框参数"""
+        return _Box(event, title, color, template, fields, display, self.json_output)
 
     @staticmethod
     def _format_box(title: str, content: list, color: str = Colors.CYAN) -> str:
         """创建带边框的文本块"""
-        max_len = max(len(title), max(len(line) for line in content)) + 4
-        border = "=" * max_len
+        # 单次遍历求最长行，避免生成器和两次 max() 调用
+        max_len = len(title)
+        for line in content:
+            line_len = len(line)
+            if line_len > max_len:
+                max_len = line_len
+        max_len += 4
+        border = _BORDER_CACHE.get(max_len)
+        if border is None:
+            border = _BORDER_CACHE[max_len] = "=" * max_len
 
-        lines = [
-            f"\n{color}{Colors.BOLD}{border}",
-            f"  {title}",
-            f"{border}{Colors.RESET}"
-        ]
+        # 每行内容都以颜色开头、RESET 结尾，行与行之间的分隔一次 join 拼好
+        style = _BOX_STYLES.get(color)
+        if style is None:
+            style = _box_style(color)
+        header_prefix, line_sep = style
+        return "".join((
+            header_prefix, border,
+            "\n  ", title,
+            "\n", border, line_sep,
+            line_sep.join(content), line_sep,
+            border, _BOX_TAIL
+        ))
 
-        for line in content:
-            lines.append(f"{color}{line}{Colors.RESET}")
+    def _log_start(self, event: str, title: str, template: str, fields: dict,
+                   display: Optional[dict] = None):
+        """
+        输出任务开始的日志框（大纲 / 图片共用，自动补上开始时间）
 
-        lines.append(f"{color}{border}{Colors.RESET}\n")
-        return "\n".join(lines)
+        Args:
+            event: 事件名
+            title: 日志框标题
+            template: 内容模板，需包含 %(timestamp)s 占位
+            fields: 事件字段（不含开始时间）
+            display: 只用于日志框的展示字段
+        """
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        fields['timestamp'] = self._get_timestamp()
+        self.logger.info("%s", self._box(event, title, Colors.CYAN, template, fields, display))
 
     def log_outline_start(self, topic: str, has_images: bool, image_count: int = 0):
         """记录大纲生成开始"""
-        content = [
-            f"📝 主题: {topic[:100]}{'...' if len(topic) > 100 else ''}",
-            f"🖼️  参考图片: {'是 (' + str(image_count) + ' 张)' if has_images else '否'}",
-            f"⏰ 开始时间: {self._get_timestamp()}"
-        ]
-        message = self._format_box("🚀 开始生成大纲", content, Colors.CYAN)
-        self.logger.info(message)
+        self._log_start("outline_start", "🚀 开始生成大纲", _OUTLINE_START_TMPL, {
+            'topic': _truncate(topic, 100),
+            'has_images': has_images,
+            'image_count': image_count
+        }, {
+            'images': f"是 ({image_count} 张)" if has_images else '否'
+        })
 
     def log_outline_api_call(self, provider: str, model: str, temperature: float,
                             max_tokens: int, prompt_length: int):
         """记录大纲生成 API 调用详情"""
-        content = [
-            f"🔌 服务商: {provider}",
-            f"🤖 模型: {model}",
-            f"🌡️  温度: {temperature}",
-            f"📏 最大Token: {max_tokens}",
-            f"📝 提示词长度: {prompt_length} 字符"
-        ]
-        message = self._format_box("📡 调用文本生成 API", content, Colors.BLUE)
-        self.logger.info(message)
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        fields = {
+            'provider': provider,
+            'model': model,
+            'temperature': temperature,
+            'max_tokens': max_tokens,
+            'prompt_length': prompt_length
+        }
+        self.logger.info("%s", self._box("outline_api_call", "📡 调用文本生成 API", Colors.BLUE,
+                                         _OUTLINE_API_CALL_TMPL, fields))
 
     def log_outline_success(self, outline_length: int, page_count: int, elapsed_time: float):
         """记录大纲生成成功"""
-        content = [
-            f"✅ 状态: 成功",
-            f"📄 生成字数: {outline_length} 字符",
-            f"📑 页面数量: {page_count} 页",
-            f"⏱️  耗时: {elapsed_time:.2f} 秒"
-        ]
-        message = self._format_box("🎉 大纲生成完成", content, Colors.GREEN)
-        self.logger.info(message)
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        fields = {
+            'outline_length': outline_length,
+            'page_count': page_count,
+            'elapsed_time': elapsed_time
+        }
+        self.logger.info("%s", self._box("outline_success", "🎉 大纲生成完成", Colors.GREEN,
+                                         _OUTLINE_SUCCESS_TMPL, fields))
 
     def log_outline_error(self, error_msg: str, error_type: str = "未知错误"):
         """记录大纲生成失败"""
-        content = [
-            f"❌ 错误类型: {error_type}",
-            f"💬 错误信息: {error_msg[:200]}{'...' if len(error_msg) > 200 else ''}"
-        ]
-        message = self._format_box("⚠️  大纲生成失败", content, Colors.RED)
-        self.logger.error(message)
+        if not self.logger.isEnabledFor(logging.ERROR):
+            return
+        fields = {
+            'error_type': error_type,
+            'error': _truncate(error_msg, 200)
+        }
+        self.logger.error("%s", self._box("outline_error", "⚠️  大纲生成失败", Colors.RED,
+                                          _OUTLINE_ERROR_TMPL, fields))
 
     def log_image_generation_start(self, task_id: str, total_pages: int, use_reference: bool):
         """记录图片生成任务开始"""
-        content = [
-            f"🎯 任务ID: {task_id}",
-            f"📊 总页数: {total_pages}",
-            f"🖼️  使用参考图: {'是' if use_reference else '否'}",
-            f"⏰ 开始时间: {self._get_timestamp()}"
-        ]
-        message = self._format_box("🚀 开始批量生成图片", content, Colors.CYAN)
-        self.logger.info(message)
+        self._log_start("image_batch_start", "🚀 开始批量生成图片", _IMAGE_START_TMPL, {
+            'task_id': task_id,
+            'total_pages': total_pages,
+            'use_reference': use_reference
+        })
+
+    def begin_image_batch(self, task_id: str, total_pages: int, use_reference: bool,
+                          detailed: bool = False) -> ImageBatchLog:
+        """
+        记录图片生成任务开始，并返回本次任务的日志累加器
+
+        Args:
+            task_id: 任务ID
+            total_pages: 总页数
+            use_reference: 是否使用参考图
+            detailed: 是否为每张图片输出单独的日志框
+
+        Returns:
+            ImageBatchLog，生图过程中记录调用和结果，结束时传给 log_batch_complete
+        """
+        self.log_image_generation_start(task_id, total_pages, use_reference)
+        return ImageBatchLog(self, detailed=detailed)
 
     def log_image_api_call(self, index: int, page_type: str, provider: str,
                           model: str, prompt_length: int, has_reference: bool,
                           attempt: int = 1, max_attempts: int = 1):
         """记录单张图片 API 调用"""
-        retry_info = f" (重试 {attempt}/{max_attempts})" if max_attempts > 1 else ""
-        content = [
-            f"📄 页面: P{index + 1} ({page_type}){retry_info}",
-            f"🔌 服务商: {provider}",
-            f"🤖 模型: {model}",
-            f"📝 提示词长度: {prompt_length} 字符",
-            f"🖼️  使用参考图: {'是' if has_reference else '否'}"
-        ]
-        message = self._format_box(f"📡 调用图片生成 API - P{index + 1}", content, Colors.BLUE)
-        self.logger.info(message)
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        fields = {
+            'page': index + 1,
+            'page_type': page_type,
+            'attempt': attempt,
+            'max_attempts': max_attempts,
+            'provider': provider,
+            'model': model,
+            'prompt_length': prompt_length,
+            'has_reference': has_reference
+        }
+        display = {'retry_info': f" (重试 {attempt}/{max_attempts})" if max_attempts > 1 else ""}
+        self.logger.info("%s", self._box("image_api_call", f"📡 调用图片生成 API - P{index + 1}", Colors.BLUE,
+                                         _IMAGE_API_CALL_TMPL, fields, display))
 
     def log_image_success(self, index: int, filename: str, file_size: int,
                          compressed: bool, elapsed_time: float):
         """记录单张图片生成成功"""
-        size_mb = file_size / (1024 * 1024)
-        content = [
-            f"✅ 状态: 成功",
-            f"📄 页面: P{index + 1}",
-            f"📁 文件名: {filename}",
-            f"💾 文件大小: {size_mb:.2f} MB",
-            f"🗜️  已压缩: {'是' if compressed else '否'}",
-            f"⏱️  耗时: {elapsed_time:.2f} 秒"
-        ]
-        message = self._format_box(f"✨ 图片生成成功 - P{index + 1}", content, Colors.GREEN)
-        self.logger.info(message)
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        fields = {
+            'page': index + 1,
+            'filename': filename,
+            'file_size': file_size,
+            'compressed': compressed,
+            'elapsed_time': elapsed_time
+        }
+        display = {'size_mb': file_size / (1024 * 1024)}
+        self.logger.info("%s", self._box("image_success", f"✨ 图片生成成功 - P{index + 1}", Colors.GREEN,
+                                         _IMAGE_SUCCESS_TMPL, fields, display))
 
     def log_image_error(self, index: int, error_msg: str, will_retry: bool = False):
         """记录单张图片生成失败"""
-        status = "将重试" if will_retry else "已失败"
-        content = [
-            f"❌ 状态: {status}",
-            f"📄 页面: P{index + 1}",
-            f"💬 错误信息: {error_msg[:200]}{'...' if len(error_msg) > 200 else ''}"
-        ]
-        color = Colors.YELLOW if will_retry else Colors.RED
-        title = f"⚠️  图片生成{'重试' if will_retry else '失败'} - P{index + 1}"
-        message = self._format_box(title, content, color)
-        self.logger.warning(message) if will_retry else self.logger.error(message)
-
-    def log_batch_complete(self, total: int, success: int, failed: int, elapsed_time: float):
-        """记录批量生成完成"""
-        success_rate = (success / total * 100) if total > 0 else 0
-        content = [
-            f"📊 总计: {total} 张",
-            f"✅ 成功: {success} 张",
-            f"❌ 失败: {failed} 张",
-            f"📈 成功率: {success_rate:.1f}%",
-            f"⏱️  总耗时: {elapsed_time:.2f} 秒"
-        ]
+        # 重试与最终失败只在级别、输出方法和展示文字上不同，一次分支全部确定
+        if will_retry:
+            level, log_fn, color, action, status = (
+                logging.WARNING, self.logger.warning, Colors.YELLOW, "重试", "将重试"
+            )
+        else:
+            level, log_fn, color, action, status = (
+                logging.ERROR, self.logger.error, Colors.RED, "失败", "已失败"
+            )
+        if not self.logger.isEnabledFor(level):
+            return
+        fields = {
+            'page': index + 1,
+            'will_retry': will_retry,
+            'error': _truncate(error_msg, 200)
+        }
+        log_fn("%s", self._box("image_error", f"⚠️  图片生成{action} - P{index + 1}", color,
+                               _IMAGE_ERROR_TMPL, fields, {'status': status}))
+
+    def log_batch_complete(self, total: int, success: int, failed: int, elapsed_time: float,
+                           batch: Optional[ImageBatchLog] = None):
+        """记录批量生成完成（传入 batch 时附带单张图片的汇总统计）"""
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        template = _BATCH_COMPLETE_TMPL
+        fields = {
+            'total': total,
+            'success': success,
+            'failed': failed,
+            'elapsed_time': elapsed_time
+        }
+        display = {'success_rate': _percent_str(success, total)}
+        if batch is not None:
+            summary_templates, summary_fields, summary_display = self._batch_summary(batch)
+            template = '\n'.join((template, *summary_templates))
+            fields.update(summary_fields)
+            display.update(summary_display)
         color = Colors.GREEN if failed == 0 else Colors.YELLOW
-        message = self._format_box("🏁 批量生成完成", content, color)
-        self.logger.info(message)
+        self.logger.info("%s", self._box("image_batch_complete", "🏁 批量生成完成", color,
+                                         template, fields, display))
+
+    @staticmethod
+    def _batch_summary(batch: ImageBatchLog) -> tuple:
+        """
+        根据累加的单张图片结果生成汇总
+
+        Returns:
+            (附加的内容模板列表, 事件字段, 展示字段)
+        """
+        templates, fields, display = [], {}, {}
+        if batch.provider is not None:
+            templates.append(_BATCH_PROVIDER_TMPL)
+            fields['provider'] = batch.provider
+            fields['model'] = batch.model
+
+        results = list(batch.results)
+        times = sorted(elapsed for _, ok, elapsed, _ in results if ok)
+        if times:
+            total_size = sum(size for _, ok, _, size in results if ok)
+            templates.append(_BATCH_TIMING_TMPL)
+            fields['avg_elapsed_time'] = sum(times) / len(times)
+            fields['p95_elapsed_time'] = times[max(0, -(-len(times) * 95 // 100) - 1)]
+            fields['total_size'] = total_size
+            display['total_mb'] = total_size / (1024 * 1024)
+
+        failed_pages = sorted(index + 1 for index, ok, _, _ in results if not ok)
+        if failed_pages:
+            templates.append(_BATCH_FAILED_TMPL)
+            fields['failed_pages'] = failed_pages
+            display['failed_pages'] = ', '.join(f'P{page}' for page in failed_pages)
+        return templates, fields, display
 
     @staticmethod
     def _get_timestamp() -> str:
-        """获取当前时间戳"""
-        from datetime import datetime
-        return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        """获取当前时间戳（格式 YYYY-MM-DD HH:MM:SS）"""
+        now = time.time()
+        minute = int(now // 60)
+        cache = _timestamp_cache
+        if getattr(cache, 'minute', None) != minute:
+            cache.minute = minute
+            cache.prefix = datetime.fromtimestamp(minute * 60).strftime("%Y-%m-%d %H:%M")
+        return f"{cache.prefix}:{int(now) % 60:02d}"
 
 
+@lru_cache(maxsize=None)
 def get_detailed_logger(logger_name: str) -> DetailedLogger:
-    """获取详细日志记录器"""
+    """获取详细日志记录器（同名只创建一次，与 logging.getLogger 一样按名称单例）"""
     logger = logging.getLogger(logger_name)
     return DetailedLogger(logger)
+
+
+# 生成服务使用的详细日志记录器（沿用服务模块名作为 logger 名称，导入即可直接使用）
+OUTLINE_LOGGER = get_detailed_logger('backend.services.outline')
+IMAGE_LOGGER = get_detailed_logger('backend.services.image')
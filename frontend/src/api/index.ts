@@ -269,6 +269,7 @@ export async function getHistoryList(
   page: number
   page_size: number
   total_pages: number
+  has_more: boolean
 }> {
   const params: any = { page, page_size: pageSize }
   if (status) params.status = status
@@ -311,12 +312,15 @@ export async function deleteHistory(recordId: string): Promise<{
 }
 
 // 搜索历史记录
-export async function searchHistory(keyword: string): Promise<{
+export async function searchHistory(
+  keyword: string,
+  mode: 'substring' | 'prefix' = 'substring'
+): Promise<{
   success: boolean
   records: HistoryRecord[]
 }> {
   const response = await axios.get(`${API_BASE_URL}/history/search`, {
-    params: { keyword }
+    params: { keyword, mode }
   })
   return response.data
 }
@@ -449,10 +453,12 @@ export interface Config {
   text_generation: {
     active_provider: string
     providers: Record<string, any>
+    clear_providers?: boolean
   }
   image_generation: {
     active_provider: string
     providers: Record<string, any>
+    clear_providers?: boolean
   }
 }
 
@@ -160,12 +160,17 @@ export function useProviderForm() {
    */
   async function autoSaveConfig() {
     try {
+      // 删除了最后一个服务商时需显式确认清空，否则后端会拒绝空的 providers
       const config: Partial<Config> = {
         text_generation: {
           active_provider: textConfig.value.active_provider,
-          providers: textConfig.value.providers
+          providers: textConfig.value.providers,
+          clear_providers: Object.keys(textConfig.value.providers).length === 0
         },
-        image_generation: imageConfig.value
+        image_generation: {
+          ...imageConfig.value,
+          clear_providers: Object.keys(imageConfig.value.providers).length === 0
+        }
       }
 
       const result = await updateConfig(config)
@@ -12,8 +12,17 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 
 @pytest.fixture
-def app():
-    """创建测试用 Flask 应用"""
+def app(tmp_path, monkeypatch):
+    """创建测试用 Flask 应用（数据库和迁移检查都指向临时目录，不读写项目的 data 目录）"""
+    from backend import database, migrations
+    monkeypatch.setattr(database, 'PROJECT_ROOT', tmp_path)
+    monkeypatch.setattr(migrations, 'PROJECT_ROOT', tmp_path)
+
+    # 每个测试使用新的数据库，清空按用户 ID / Token 缓存的认证结果
+    from backend.utils import auth
+    auth._user_cache.clear()
+    auth._token_cache.clear()
+
     from backend.app import create_app
     app = create_app()
     app.config['TESTING'] = True
@@ -26,6 +35,22 @@ def client(app):
     return app.test_client()
 
 
+@pytest.fixture
+def login_user(client):
+    """
+    注册并登录用户的工厂函数
+
+    调用方式：user_id, headers = login_user('alice')，headers 为带 Bearer Token 的请求头
+    """
+    def _login_user(username='test_user', password='secret-pass'):
+        response = client.post('/api/auth/register', json={'username': username, 'password': password})
+        assert response.status_code == 201
+        data = response.get_json()
+        return data['user']['id'], {'Authorization': f"Bearer {data['token']}"}
+
+    return _login_user
+
+
 @pytest.fixture
 def temp_history_dir():
     """创建临时历史目录"""
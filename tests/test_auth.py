@@ -0,0 +1,211 @@
+import time
+
+import bcrypt
+import jwt
+import pytest
+
+from backend.utils import auth
+
+
+def _create_user(username, password_hash, is_active=True):
+    from backend.models import db, User
+
+    user = User(username=username, password_hash=password_hash, is_active=is_active)
+    db.session.add(user)
+    db.session.commit()
+    return user.id
+
+
+def _bcrypt_hash(password):
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=4)).decode('utf-8')
+
+
+def test_hash_password_uses_argon2():
+    password_hash = auth.hash_password('secret-pass')
+    assert password_hash.startswith(auth.ARGON2_HASH_PREFIX)
+    assert auth.verify_password('secret-pass', password_hash) is True
+    assert auth.verify_password('wrong-pass', password_hash) is False
+    assert auth.password_needs_rehash(password_hash) is False
+
+
+def test_verify_password_falls_back_to_bcrypt():
+    password_hash = _bcrypt_hash('secret-pass')
+    assert auth.verify_password('secret-pass', password_hash) is True
+    assert auth.verify_password('wrong-pass', password_hash) is False
+    assert auth.password_needs_rehash(password_hash) is True
+
+
+def test_login_rehashes_bcrypt_password_to_argon2(app, client):
+    from backend.models import db, User
+
+    with app.app_context():
+        user_id = _create_user('legacy_user', _bcrypt_hash('secret-pass'))
+
+    response = client.post('/api/auth/login', json={'username': 'legacy_user', 'password': 'secret-pass'})
+    assert response.status_code == 200
+
+    with app.app_context():
+        password_hash = db.session.get(User, user_id).password_hash
+        assert password_hash.startswith(auth.ARGON2_HASH_PREFIX)
+
+    # 升级后的哈希仍可正常登录
+    response = client.post('/api/auth/login', json={'username': 'legacy_user', 'password': 'secret-pass'})
+    assert response.status_code == 200
+
+
+def _token(payload, algorithm=auth.JWT_ALGORITHM, key=auth.JWT_SECRET_KEY):
+    return jwt.encode(payload, key, algorithm=algorithm)
+
+
+def _claims(**extra):
+    now = int(time.time())
+    claims = {'user_id': 1, 'username': 'alice', 'iat': now, 'exp': now + 3600}
+    claims.update(extra)
+    return claims
+
+
+def test_fast_decode_accepts_valid_token():
+    token = auth.generate_token(1, 'alice')
+    assert auth._fast_decode(token) == jwt.decode(token, auth.JWT_SECRET_KEY, algorithms=[auth.JWT_ALGORITHM])
+
+
+@pytest.mark.filterwarnings('ignore::jwt.warnings.InsecureKeyLengthWarning')
+def test_fast_decode_rejects_invalid_tokens():
+    valid = _token(_claims())
+    header, payload, signature = valid.split('.')
+    tampered_signature = signature[:-2] + ('AA' if signature[-2:] != 'AA' else 'BB')
+    tampered_payload = _token(_claims(user_id=2)).split('.')[1]
+    # 长度除以 4 余 1 的片段无论怎样补 '=' 都不是合法的 base64
+    bad_padding = payload + 'A' * ((1 - len(payload)) % 4)
+    invalid_tokens = {
+        'tampered signature': f"{header}.{payload}.{tampered_signature}",
+        'tampered payload': f"{header}.{tampered_payload}.{signature}",
+        'wrong key': _token(_claims(), key='another-secret'),
+        'HS512': _token(_claims(), algorithm='HS512'),
+        'alg none': _token(_claims(), algorithm='none', key=None),
+        'expired': _token(_claims(exp=1)),
+        'one segment': 'not-a-token',
+        'two segments': f"{header}.{payload}",
+        'four segments': f"{valid}.extra",
+        'bad padding': f"{header}.{bad_padding}.{signature}",
+        'bad base64': f"{header}.{payload}.!!!",
+        'non ascii': f"{header}.{payload}é.{signature}",
+    }
+    for name, token in invalid_tokens.items():
+        assert auth._fast_decode(token) is None, name
+        # 快速路径失败后交给 PyJWT，抛出与原来相同的异常
+        with pytest.raises(jwt.InvalidTokenError):
+            auth.decode_token(token)
+
+
+def test_unsupported_claims_fall_back_to_pyjwt(monkeypatch):
+    calls = []
+    original_decode = jwt.decode
+
+    def spy_decode(*args, **kwargs):
+        calls.append(args[0])
+        return original_decode(*args, **kwargs)
+
+    monkeypatch.setattr(auth.jwt, 'decode', spy_decode)
+    now = int(time.time())
+
+    nbf_token = _token(_claims(nbf=now - 10))
+    assert auth._fast_decode(nbf_token) is None
+    assert auth.decode_token(nbf_token)['user_id'] == 1
+    assert calls == [nbf_token]
+
+    aud_token = _token(_claims(aud='someone-else'))
+    assert auth._fast_decode(aud_token) is None
+    with pytest.raises(jwt.InvalidAudienceError):
+        auth.decode_token(aud_token)
+    assert calls[-1] == aud_token
+
+    future_iat_token = _token(_claims(iat=now + 3600))
+    assert auth._fast_decode(future_iat_token) is None
+    with pytest.raises(jwt.ImmatureSignatureError):
+        auth.decode_token(future_iat_token)
+    assert calls[-1] == future_iat_token
+
+
+def _create_logged_in_user(login_user, client, username):
+    user_id, headers = login_user(username)
+    # 第一次访问把用户写入认证缓存
+    assert client.get('/api/auth/me', headers=headers).status_code == 200
+    assert user_id in auth._user_cache
+    return user_id, headers
+
+
+def test_disabled_user_is_rejected_immediately(app, client, login_user):
+    from backend.models import db, User
+
+    user_id, headers = _create_logged_in_user(login_user, client, 'to_disable')
+    with app.app_context():
+        db.session.get(User, user_id).is_active = False
+        db.session.commit()
+
+    response = client.get('/api/auth/me', headers=headers)
+    assert response.status_code == 401
+    assert response.get_json()['code'] == 'USER_DISABLED'
+
+
+def test_deleted_user_is_rejected_immediately(app, client, login_user):
+    from backend.models import db, User
+
+    user_id, headers = _create_logged_in_user(login_user, client, 'to_delete')
+    with app.app_context():
+        db.session.delete(db.session.get(User, user_id))
+        db.session.commit()
+
+    response = client.get('/api/auth/me', headers=headers)
+    assert response.status_code == 401
+    assert response.get_json()['code'] == 'USER_NOT_FOUND'
+
+
+def test_password_change_invalidates_cached_user(app, client, login_user):
+    from backend.models import db, User
+
+    user_id, _ = _create_logged_in_user(login_user, client, 'to_change')
+    with app.app_context():
+        db.session.get(User, user_id).password_hash = auth.hash_password('new-secret')
+        db.session.commit()
+
+    assert user_id not in auth._user_cache
+
+
+def test_bulk_update_invalidates_cached_users(app, client, login_user):
+    from backend.models import db, User
+
+    user_id, headers = _create_logged_in_user(login_user, client, 'bulk_disable')
+    with app.app_context():
+        User.query.filter_by(id=user_id).update({'is_active': False})
+        db.session.commit()
+
+    response = client.get('/api/auth/me', headers=headers)
+    assert response.status_code == 401
+    assert response.get_json()['code'] == 'USER_DISABLED'
+
+
+def test_authenticated_user_not_reused_across_requests_in_one_app_context(app, client, login_user):
+    _, headers = _create_logged_in_user(login_user, client, 'shared_context')
+
+    with app.app_context():
+        assert client.get('/api/auth/me', headers=headers).status_code == 200
+        # 同一应用上下文中的下一个请求不带 Token，不能沿用上一个请求的用户
+        response = client.get('/api/auth/me')
+        assert response.status_code == 401
+
+
+@pytest.mark.parametrize('username, password, error', [
+    ('', 'secret-pass', '用户名不能为空'),
+    ('   ', 'secret-pass', '用户名不能为空'),
+    ('ab', 'secret-pass', '用户名长度需在 3-50 个字符之间'),
+    ('a' * 51, 'secret-pass', '用户名长度需在 3-50 个字符之间'),
+    ('bad\x07name', 'secret-pass', '用户名不能包含控制字符'),
+    ('valid_user', '', '密码不能为空'),
+    ('valid_user', '12345', '密码长度不能少于 6 位'),
+    ('valid_user', 'x' * 129, '密码长度不能超过 128 位'),
+])
+def test_register_validation_messages(client, username, password, error):
+    response = client.post('/api/auth/register', json={'username': username, 'password': password})
+    assert response.status_code == 400
+    assert response.get_json()['error'] == error
@@ -0,0 +1,126 @@
+import contextvars
+
+from backend.config import Config
+
+
+def test_reload_config_invalidates_other_contexts(app):
+    from backend.models import db, ProviderConfig
+
+    with app.app_context():
+        # 模拟另一个线程/请求：在独立的上下文副本中加载并缓存配置
+        other = contextvars.copy_context()
+        first = other.run(Config.load_text_providers_config)
+        assert first['providers'] == {}
+
+        db.session.add(ProviderConfig(
+            category='text', name='p', provider_type='openai_compatible',
+            api_key='key', model='m', is_active=True
+        ))
+        db.session.commit()
+
+        # 未重新加载前，该上下文沿用已缓存的配置
+        assert other.run(Config.load_text_providers_config) is first
+
+        # 在当前上下文重新加载后，其他上下文的缓存同样失效
+        Config.reload_config()
+        second = other.run(Config.load_text_providers_config)
+        assert second['active_provider'] == 'p'
+        assert second['providers']['p']['api_key'] == 'key'
+
+
+def _save_text_provider(client, headers, model):
+    response = client.post('/api/config', headers=headers, json={'text_generation': {
+        'active_provider': 'p',
+        'providers': {'p': {'type': 'openai_compatible', 'api_key': 'key', 'model': model}},
+    }})
+    assert response.status_code == 200
+
+
+def test_get_config_returns_304_for_matching_etag(client, login_user):
+    _, headers = login_user()
+    _save_text_provider(client, headers, 'm1')
+
+    response = client.get('/api/config', headers=headers)
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+
+    response = client.get('/api/config', headers={**headers, 'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+
+
+def test_get_config_etag_changes_after_update(app, client, login_user):
+    from backend.models import db, ProviderConfig
+
+    _, headers = login_user()
+    _save_text_provider(client, headers, 'm1')
+    etag = client.get('/api/config', headers=headers).headers['ETag']
+    with app.app_context():
+        updated_at = db.session.query(ProviderConfig.updated_at).scalar()
+
+    _save_text_provider(client, headers, 'm2')
+    with app.app_context():
+        # 模拟两次写入落在同一时间戳内：行数和 updated_at 都与上次相同
+        db.session.query(ProviderConfig).update({'updated_at': updated_at})
+        db.session.commit()
+
+    response = client.get('/api/config', headers={**headers, 'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert response.get_json()['config']['text_generation']['providers']['p']['model'] == 'm2'
+
+
+def test_get_config_reuses_cached_body_until_saved(client, login_user, monkeypatch):
+    from backend.routes import config_routes
+
+    calls = []
+    original_payload = config_routes._get_full_config_payload
+
+    def spy_payload(*args, **kwargs):
+        calls.append(args)
+        return original_payload(*args, **kwargs)
+
+    monkeypatch.setattr(config_routes, '_get_full_config_payload', spy_payload)
+    _, headers = login_user()
+    _save_text_provider(client, headers, 'm1')
+
+    first = client.get('/api/config', headers=headers)
+    second = client.get('/api/config', headers=headers)
+    assert second.data == first.data
+    assert client.get('/api/config', headers={**headers, 'If-None-Match': first.headers['ETag']}).status_code == 304
+    # 配置未变化时只构建一次响应内容
+    assert len(calls) == 1
+
+    _save_text_provider(client, headers, 'm2')
+    client.get('/api/config', headers=headers)
+    assert len(calls) == 2
+
+
+def _text_provider_names(client, headers):
+    config = client.get('/api/config', headers=headers).get_json()['config']
+    return list(config['text_generation']['providers'])
+
+
+def test_empty_providers_without_confirmation_is_rejected(client, login_user):
+    _, headers = login_user()
+    _save_text_provider(client, headers, 'm1')
+
+    response = client.post('/api/config', headers=headers, json={
+        'text_generation': {'active_provider': '', 'providers': {}}
+    })
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
+    assert _text_provider_names(client, headers) == ['p']
+
+
+def test_clear_providers_deletes_last_provider(client, login_user):
+    _, headers = login_user()
+    _save_text_provider(client, headers, 'm1')
+
+    response = client.post('/api/config', headers=headers, json={
+        'text_generation': {'active_provider': '', 'providers': {}, 'clear_providers': True},
+        # 未配置过的类别提交空 providers 不需要确认
+        'image_generation': {'active_provider': '', 'providers': {}},
+    })
+    assert response.status_code == 200
+    assert _text_provider_names(client, headers) == []
@@ -0,0 +1,59 @@
+def _create_records(service, count, status=None):
+    record_ids = []
+    for i in range(count):
+        record_id = service.create_record(f"记录{i}", {"raw": "", "pages": []})
+        if status is not None:
+            service.update_record(record_id, status=status)
+        record_ids.append(record_id)
+    return record_ids
+
+
+def _page(service, page, page_size=3, status=None):
+    result = service.list_records(page=page, page_size=page_size, status=status)
+    return len(result["records"]), result["total"], result["total_pages"], result["has_more"]
+
+
+def test_list_records_empty(app):
+    from backend.services.history import get_history_service
+
+    with app.app_context():
+        service = get_history_service()
+        assert _page(service, 1) == (0, 0, 0, False)
+        assert _page(service, 2) == (0, 0, 0, False)
+
+
+def test_list_records_exactly_one_page(app):
+    from backend.services.history import get_history_service
+
+    with app.app_context():
+        service = get_history_service()
+        _create_records(service, 3)
+        assert _page(service, 1) == (3, 3, 1, False)
+        # 越界的页码仍返回正确的总数
+        assert _page(service, 2) == (0, 3, 1, False)
+
+
+def test_list_records_last_page(app):
+    from backend.services.history import get_history_service
+
+    with app.app_context():
+        service = get_history_service()
+        _create_records(service, 7)
+        assert _page(service, 1) == (3, 7, 3, True)
+        assert _page(service, 2) == (3, 7, 3, True)
+        assert _page(service, 3) == (1, 7, 3, False)
+
+
+def test_list_records_status_filter(app):
+    from backend.services.history import get_history_service
+
+    with app.app_context():
+        service = get_history_service()
+        _create_records(service, 4, status="completed")
+        _create_records(service, 2)
+
+        assert _page(service, 1, status="completed") == (3, 4, 2, True)
+        assert _page(service, 2, status="completed") == (1, 4, 2, False)
+        assert _page(service, 1, status="draft") == (2, 2, 1, False)
+        assert _page(service, 1, status="partial") == (0, 0, 0, False)
+        assert _page(service, 1, page_size=10) == (6, 6, 1, False)
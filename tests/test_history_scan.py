@@ -0,0 +1,80 @@
+def test_scan_all_tasks_with_several_directories(app, sample_pages, tmp_path, monkeypatch):
+    from backend.services import history
+    from backend.models import db, HistoryRecord, TaskImage
+
+    history_dir = tmp_path / "history"
+
+    images_by_task = {
+        "task_full": ["0.png", "1.png", "2.png", "3.png"],
+        "task_partial": ["1.png", "0.jpg"],
+        "task_empty": [],
+        "task_orphan": ["0.png"],
+        "task_gone": ["0.png"],
+    }
+    for task_id, names in images_by_task.items():
+        task_dir = history_dir / task_id
+        task_dir.mkdir(parents=True)
+        for name in names + ["thumb_0.png"]:
+            (task_dir / name).write_bytes(b"x")
+
+    # task_gone 在列出目录后、扫描前被删除
+    original_scan = history._scan_task_images
+
+    def scan(task_dir):
+        if task_dir.endswith("task_gone"):
+            raise FileNotFoundError(task_dir)
+        return original_scan(task_dir)
+
+    monkeypatch.setattr(history, '_scan_task_images', scan)
+
+    with app.app_context():
+        service = history.get_history_service()
+        monkeypatch.setattr(service, 'history_dir', str(history_dir))
+        outline = {"raw": "", "pages": sample_pages}
+        record_ids = {
+            task_id: service.create_record(task_id, outline, task_id=task_id)
+            for task_id in ("task_full", "task_partial", "task_empty", "task_gone", "task_no_dir")
+        }
+
+        result = service.scan_all_tasks()
+
+        assert result["success"] is True
+        assert result["total_tasks"] == 5
+        assert result["synced"] == 3
+        assert result["failed"] == 1
+        assert result["orphan_tasks"] == ["task_orphan"]
+
+        # 结果与任务一一对应（并发扫描后顺序不乱）
+        by_task = {r["task_id"]: r for r in result["results"] if r.get("success")}
+        assert by_task["task_full"]["status"] == "completed"
+        assert by_task["task_partial"]["images"] == ["0.jpg", "1.png"]
+        assert by_task["task_partial"]["status"] == "partial"
+        assert by_task["task_empty"]["status"] == "draft"
+        assert by_task["task_orphan"]["no_record"] is True
+        assert [r for r in result["results"] if not r.get("success")][0]["error"].startswith("扫描任务失败")
+
+        def filenames(task_id):
+            return [
+                img.filename for img in
+                TaskImage.query.filter_by(record_id=record_ids[task_id]).order_by(TaskImage.image_index)
+            ]
+
+        assert filenames("task_full") == images_by_task["task_full"]
+        assert filenames("task_partial") == ["0.jpg", "1.png"]
+        assert filenames("task_empty") == []
+
+        # 扫描失败和没有任务目录的记录保持原状
+        for task_id in ("task_gone", "task_no_dir"):
+            record = db.session.get(HistoryRecord, record_ids[task_id])
+            assert record.status == "draft"
+            assert filenames(task_id) == []
+
+
+def test_scan_single_missing_task(app, tmp_path, monkeypatch):
+    from backend.services.history import get_history_service
+
+    with app.app_context():
+        service = get_history_service()
+        monkeypatch.setattr(service, 'history_dir', str(tmp_path))
+        result = service.scan_and_sync_task_images("task_missing")
+        assert result["success"] is False
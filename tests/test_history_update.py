@@ -34,3 +34,117 @@ def test_update_record_accepts_null_filenames(app, sample_outline):
 
         record = HistoryRecord.query.get(record_id)
         assert record.task_id == "task_test"
+
+
+def _image_rows(record_id):
+    from backend.models import TaskImage
+
+    return [
+        (img.image_index, img.filename, img.id)
+        for img in TaskImage.query.filter_by(record_id=record_id).order_by(TaskImage.image_index)
+    ]
+
+
+def test_update_record_diffs_images(app, sample_outline):
+    from backend.services.history import get_history_service
+
+    with app.app_context():
+        service = get_history_service()
+        record_id = service.create_record("图片增删", sample_outline)
+
+        assert service.update_record(record_id, images={"generated": ["0.png"]})
+        first_id = _image_rows(record_id)[0][2]
+
+        # 新增：原有行保留（同一主键），只插入新的序号
+        assert service.update_record(record_id, images={"generated": ["0.png", "1.png", "2.png"]})
+        rows = _image_rows(record_id)
+        assert [(index, name) for index, name, _ in rows] == [(0, "0.png"), (1, "1.png"), (2, "2.png")]
+        assert rows[0][2] == first_id
+
+        # 调换顺序：按序号原地更新文件名
+        assert service.update_record(record_id, images={"generated": ["2.png", "1.png", "0.png"]})
+        rows = _image_rows(record_id)
+        assert [(index, name) for index, name, _ in rows] == [(0, "2.png"), (1, "1.png"), (2, "0.png")]
+        assert rows[0][2] == first_id
+
+        # 删除：多余的序号被移除
+        assert service.update_record(record_id, images={"generated": ["2.png"]})
+        assert [(index, name) for index, name, _ in _image_rows(record_id)] == [(0, "2.png")]
+
+        assert service.update_record(record_id, images={"generated": []})
+        assert _image_rows(record_id) == []
+
+
+def test_update_record_keeps_page_count_in_sync(app, sample_pages):
+    from backend.services.history import get_history_service
+    from backend.models import db, HistoryRecord, OutlinePage
+
+    def pages_of(record_id):
+        return [
+            (page.page_index, page.page_type, page.content)
+            for page in OutlinePage.query.filter_by(record_id=record_id).order_by(OutlinePage.page_index)
+        ]
+
+    with app.app_context():
+        service = get_history_service()
+        record_id = service.create_record("页数同步", {"raw": "", "pages": sample_pages})
+        assert db.session.get(HistoryRecord, record_id).page_count == 4
+
+        fewer = [{"index": 0, "type": "cover", "content": "新封面"}, sample_pages[1]]
+        assert service.update_record(record_id, outline={"raw": "r", "pages": fewer})
+        assert db.session.get(HistoryRecord, record_id).page_count == 2
+        assert pages_of(record_id) == [(0, "cover", "新封面"), (1, "content", "测试内容页1")]
+
+        more = sample_pages + [{"index": 4, "type": "content", "content": "追加页"}]
+        assert service.update_record(record_id, outline={"raw": "r", "pages": more})
+        assert db.session.get(HistoryRecord, record_id).page_count == 5
+        assert [content for _, _, content in pages_of(record_id)] == [
+            "测试封面内容", "测试内容页1", "测试内容页2", "测试总结页", "追加页"
+        ]
+
+
+def test_update_record_page_count_with_loaded_record(app, sample_outline, sample_pages):
+    from backend.services.history import get_history_service
+    from backend.models import db, HistoryRecord, OutlinePage
+
+    with app.app_context():
+        service = get_history_service()
+        record_id = service.create_record("已加载的记录", sample_outline)
+
+        # 持有已加载 pages 集合的记录对象：它会一直留在会话的 identity map 中
+        record = db.session.get(HistoryRecord, record_id)
+        assert len(record.pages) == 3
+
+        more = sample_pages + [{"index": 4, "type": "content", "content": "追加页"}]
+        assert service.update_record(record_id, outline={"raw": "r", "pages": more})
+
+        db.session.expire_all()
+        assert record.page_count == 5
+        assert len(record.pages) == 5
+        assert OutlinePage.query.filter_by(record_id=record_id).count() == 5
+
+
+def test_scan_sync_diffs_images_and_sets_status(app, sample_pages, tmp_path, monkeypatch):
+    from backend.services.history import get_history_service
+    from backend.models import db, HistoryRecord
+
+    with app.app_context():
+        service = get_history_service()
+        monkeypatch.setattr(service, 'history_dir', str(tmp_path))
+        record_id = service.create_record("扫描同步", {"raw": "", "pages": sample_pages}, task_id="task_scan")
+        service.update_record(record_id, images={"generated": ["0.png", "old.png", "9.png", "extra.png"]})
+
+        task_dir = tmp_path / "task_scan"
+        task_dir.mkdir()
+        for name in ("1.png", "0.png", "thumb_0.png", "notes.txt"):
+            (task_dir / name).write_bytes(b"x")
+
+        result = service.scan_and_sync_task_images("task_scan")
+        assert result["success"] is True
+        assert result["images"] == ["0.png", "1.png"]
+        assert result["status"] == "partial"
+        assert [(index, name) for index, name, _ in _image_rows(record_id)] == [(0, "0.png"), (1, "1.png")]
+
+        record = db.session.get(HistoryRecord, record_id)
+        assert record.thumbnail == "0.png"
+        assert record.page_count == 4
@@ -0,0 +1,205 @@
+import io
+import logging
+import queue
+import re
+import threading
+
+import pytest
+
+from backend.app import _BurstBufferHandler, _DeferredQueueHandler
+from backend.utils import json_utils
+from backend.utils import logger as logger_module
+from backend.utils.logger import DetailedLogger, ImageBatchLog
+
+
+def _make_record(msg, args, exc_info=None):
+    return logging.LogRecord('test', logging.INFO, __file__, 1, msg, args, exc_info)
+
+
+def test_box_records_are_formatted_on_listener_thread(monkeypatch):
+    format_threads = []
+    original_format_box = DetailedLogger._format_box
+
+    def spy_format_box(*args):
+        format_threads.append(threading.current_thread())
+        return original_format_box(*args)
+
+    monkeypatch.setattr(DetailedLogger, '_format_box', staticmethod(spy_format_box))
+
+    log_queue = queue.SimpleQueue()
+    box = logger_module._Box('event', 'title', logger_module.Colors.CYAN, '%(line)s', {'line': 'x'}, json_output=False)
+    _DeferredQueueHandler(log_queue).handle(_make_record("%s", (box,)))
+
+    # 入队时不拼接日志框，参数原样保留
+    record = log_queue.get_nowait()
+    assert format_threads == []
+    assert record.args == (box,)
+
+    listener = threading.Thread(target=record.getMessage)
+    listener.start()
+    listener.join()
+    assert format_threads == [listener]
+
+
+def test_plain_records_are_formatted_before_enqueue():
+    log_queue = queue.SimpleQueue()
+    _DeferredQueueHandler(log_queue).handle(_make_record("%s items", (['mutable'],)))
+
+    record = log_queue.get_nowait()
+    assert record.msg == "['mutable'] items"
+    assert record.args is None
+
+
+def test_burst_buffer_applies_target_filters():
+    stream = io.StringIO()
+    target = logging.StreamHandler(stream)
+    target.setLevel(logging.INFO)
+    target.addFilter(lambda record: 'secret' not in record.getMessage())
+
+    log_queue = queue.SimpleQueue()
+    log_queue.put(None)  # 队列非空时记录先留在缓冲区
+    handler = _BurstBufferHandler(16, log_queue, target)
+    for level, msg in ((logging.INFO, 'kept'), (logging.INFO, 'secret'), (logging.DEBUG, 'debug')):
+        handler.handle(logging.LogRecord('test', level, __file__, 1, msg, None, None))
+    handler.flush()
+
+    assert stream.getvalue() == 'kept\n'
+
+
+class _FakeStdout:
+    def __init__(self, tty):
+        self.tty = tty
+
+    def isatty(self):
+        return self.tty
+
+
+def _capture(detailed_logger):
+    records = []
+    handler = logging.Handler()
+    handler.emit = lambda record: records.append(record.getMessage())
+    detailed_logger.logger.addHandler(handler)
+    return records, handler
+
+
+def test_output_format_follows_stdout_at_emit_time(monkeypatch):
+    detailed_logger = logger_module.OUTLINE_LOGGER
+    detailed_logger.logger.setLevel(logging.INFO)
+    records, handler = _capture(detailed_logger)
+    try:
+        # 单例在导入时已创建，之后换成终端输出仍按终端格式输出日志框
+        monkeypatch.setattr(logger_module.sys, 'stdout', _FakeStdout(True))
+        detailed_logger.log_outline_error('boom')
+        monkeypatch.setattr(logger_module.sys, 'stdout', _FakeStdout(False))
+        detailed_logger.log_outline_error('boom')
+    finally:
+        detailed_logger.logger.removeHandler(handler)
+        detailed_logger.logger.setLevel(logging.NOTSET)
+
+    assert records[0].startswith('\n\033[91m')
+    assert json_utils.loads(records[1]) == {'event': 'outline_error', 'error_type': '未知错误', 'error': 'boom'}
+
+
+def test_json_output_has_structured_fields():
+    detailed_logger = DetailedLogger(logging.getLogger('test.json_output'), json_output=True)
+    detailed_logger.logger.setLevel(logging.INFO)
+    records, _ = _capture(detailed_logger)
+
+    detailed_logger.log_image_success(0, '0.png', 2048, True, 1.5)
+    detailed_logger.log_image_error(1, 'boom', will_retry=True)
+
+    assert [json_utils.loads(record) for record in records] == [
+        {'event': 'image_success', 'page': 1, 'filename': '0.png', 'file_size': 2048,
+         'compressed': True, 'elapsed_time': 1.5},
+        {'event': 'image_error', 'page': 2, 'will_retry': True, 'error': 'boom'},
+    ]
+
+
+def _batch_logger(name, json_output):
+    detailed_logger = DetailedLogger(logging.getLogger(name), json_output=json_output)
+    detailed_logger.logger.setLevel(logging.INFO)
+    records, _ = _capture(detailed_logger)
+    return detailed_logger, records
+
+
+def _run_batch(detailed_logger, detailed=False):
+    batch = ImageBatchLog(detailed_logger, detailed=detailed)
+    # 结果按完成顺序追加，与页码顺序无关
+    for index, elapsed in ((2, 3.0), (0, 1.0), (1, 2.0)):
+        batch.record_call(index, 'content', 'provider-a', 'model-x', 100, False)
+        batch.record_result(index, True, elapsed, 1024 * 1024, f"{index}.png")
+    batch.record_call(3, 'content', 'provider-a', 'model-x', 100, False)
+    batch.record_result(4, False)
+    batch.record_result(3, False)
+    return batch
+
+
+def test_image_batch_logs_single_summary():
+    detailed_logger, records = _batch_logger('test.batch_summary', json_output=False)
+    batch = _run_batch(detailed_logger)
+    # 非 detailed 模式下单张图片不单独输出日志框
+    assert records == []
+
+    detailed_logger.log_batch_complete(5, 3, 2, 6.5, batch)
+    assert len(records) == 1
+    # 去掉颜色代码后，取标题下方边框与结尾边框之间的内容行
+    lines = re.sub(r'\033\[\d+m', '', records[0]).split('\n')
+    assert lines[4:-2] == [
+        '📊 总计: 5 张',
+        '✅ 成功: 3 张',
+        '❌ 失败: 2 张',
+        '📈 成功率: 60.0%',
+        '⏱️  总耗时: 6.50 秒',
+        '🔌 服务商: provider-a (model-x)',
+        '⏱️  单张耗时: 平均 2.00 秒, P95 3.00 秒',
+        '💾 图片总大小: 3.00 MB',
+        '📄 失败页面: P4, P5',
+    ]
+
+
+def test_image_batch_summary_json_fields():
+    detailed_logger, records = _batch_logger('test.batch_summary_json', json_output=True)
+    detailed_logger.log_batch_complete(5, 3, 2, 6.5, _run_batch(detailed_logger))
+
+    assert json_utils.loads(records[0]) == {
+        'event': 'image_batch_complete', 'total': 5, 'success': 3, 'failed': 2, 'elapsed_time': 6.5,
+        'provider': 'provider-a', 'model': 'model-x',
+        'avg_elapsed_time': 2.0, 'p95_elapsed_time': 3.0, 'total_size': 3 * 1024 * 1024,
+        'failed_pages': [4, 5],
+    }
+
+
+def test_detailed_image_batch_logs_every_page():
+    detailed_logger, records = _batch_logger('test.batch_detailed', json_output=True)
+    _run_batch(detailed_logger, detailed=True)
+
+    events = [json_utils.loads(record)['event'] for record in records]
+    assert events.count('image_api_call') == 4
+    assert events.count('image_success') == 3
+
+
+def test_empty_batch_adds_no_summary_fields():
+    detailed_logger, records = _batch_logger('test.batch_empty', json_output=True)
+    detailed_logger.log_batch_complete(0, 0, 0, 0.0, ImageBatchLog(detailed_logger))
+
+    assert json_utils.loads(records[0]) == {
+        'event': 'image_batch_complete', 'total': 0, 'success': 0, 'failed': 0, 'elapsed_time': 0.0,
+    }
+
+
+@pytest.mark.parametrize('part, total, expected', [
+    (0, 0, '0.0'),
+    (0, 3, '0.0'),
+    (1, 3, '33.3'),
+    (2, 3, '66.7'),
+    (3, 3, '100.0'),
+    (199, 200, '99.5'),
+    (1999, 2000, '100.0'),
+    (1, 8, '12.5'),
+    # 恰好在中间时取偶数：28.75% → 28.8，18.75% → 18.8，1.25% → 1.2
+    (23, 80, '28.8'),
+    (3, 16, '18.8'),
+    (1, 80, '1.2'),
+])
+def test_percent_str(part, total, expected):
+    assert logger_module._percent_str(part, total) == expected
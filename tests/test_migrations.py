@@ -0,0 +1,99 @@
+from backend import migrations
+from backend.utils import json_utils
+
+
+def test_schema_version_stored_in_database(app):
+    with app.app_context():
+        assert migrations.get_schema_version() == migrations.MIGRATION_SCHEMA_VERSION
+
+
+def test_failed_migration_does_not_record_version(app, tmp_path):
+    # 无法解析的 YAML 会让服务商配置迁移失败
+    (tmp_path / 'text_providers.yaml').write_text("providers: [unclosed", encoding='utf-8')
+
+    with app.app_context():
+        migrations.set_schema_version(0)
+        migrations.check_and_migrate()
+        assert migrations.get_schema_version() == 0
+
+        # 修复配置文件后下次启动会重试，并在成功后记录版本
+        (tmp_path / 'text_providers.yaml').write_text(
+            "active_provider: p\nproviders:\n  p:\n    api_key: k\n    model: m\n",
+            encoding='utf-8'
+        )
+        migrations.check_and_migrate()
+        assert migrations.get_schema_version() == migrations.MIGRATION_SCHEMA_VERSION
+
+        from backend.models import ProviderConfig
+        assert ProviderConfig.query.filter_by(category='text', name='p').count() == 1
+
+
+def test_restored_database_is_checked_again(app):
+    with app.app_context():
+        # 换回旧数据库文件：user_version 仍是 0，启动时必须重新检查 schema
+        migrations.set_schema_version(0)
+        migrations.check_and_migrate()
+        assert migrations.get_schema_version() == migrations.MIGRATION_SCHEMA_VERSION
+
+
+def _write_history(history_dir, records):
+    history_dir.mkdir()
+    (history_dir / 'index.json').write_text(
+        json_utils.dumps({'records': [{'id': record_id} for record_id in records]}), encoding='utf-8'
+    )
+    for record_id, record in records.items():
+        (history_dir / f"{record_id}.json").write_text(json_utils.dumps(record), encoding='utf-8')
+
+
+def _history_record(title, pages):
+    return {
+        'title': title,
+        'outline': {'raw': title, 'pages': pages},
+        'images': {'task_id': f"task_{title}", 'generated': ['0.png']},
+    }
+
+
+def test_history_migration_keeps_good_records_when_one_fails(app, tmp_path):
+    from backend.models import HistoryRecord, OutlinePage, TaskImage
+
+    page = {'index': 0, 'type': 'cover', 'content': 'c'}
+    _write_history(tmp_path / 'history', {
+        'r1': _history_record('r1', [page]),
+        # 页面序号重复，违反唯一约束：整批写入失败，逐条写入时只有这一条失败
+        'bad': _history_record('bad', [page, page]),
+        'r2': _history_record('r2', [page]),
+        'r3': _history_record('r3', []),
+    })
+
+    with app.app_context():
+        assert migrations.migrate_history_records() == (3, False)
+        assert sorted(record.id for record in HistoryRecord.query) == ['r1', 'r2', 'r3']
+        assert OutlinePage.query.filter_by(record_id='bad').count() == 0
+        assert TaskImage.query.filter_by(record_id='bad').count() == 0
+        assert OutlinePage.query.count() == 2
+        assert TaskImage.query.count() == 3
+
+
+def test_history_migration_batches_all_records(app, tmp_path):
+    from backend.models import HistoryRecord
+
+    page = {'index': 0, 'type': 'cover', 'content': 'c'}
+    records = {f"r{i}": _history_record(f"r{i}", [page]) for i in range(migrations.MIGRATION_BATCH_SIZE + 3)}
+    _write_history(tmp_path / 'history', records)
+
+    with app.app_context():
+        assert migrations.migrate_history_records() == (len(records), True)
+        assert HistoryRecord.query.count() == len(records)
+
+
+def test_existing_providers_skip_history_import(app, tmp_path):
+    from backend.models import db, HistoryRecord, ProviderConfig
+
+    # 已在使用数据库（有配置、历史记录已被用户删光）时，不再从旧的 index.json 导入
+    _write_history(tmp_path / 'history', {'r1': _history_record('r1', [])})
+    with app.app_context():
+        db.session.add(ProviderConfig(category='text', name='p', provider_type='openai_compatible'))
+        db.session.commit()
+
+        migrations.check_and_migrate(force=True)
+        assert HistoryRecord.query.count() == 0